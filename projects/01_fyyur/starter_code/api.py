@@ -0,0 +1,87 @@
+#----------------------------------------------------------------------------#
+# JSON API helpers: cursors, sparse fieldsets and conditional responses.
+#
+# Every resource row carries an updated_at version. A response's strong ETag
+# is derived from the (id, updated_at) of the rows it holds plus the fields
+# asked for, so it is known as soon as the rows are read: a matching
+# If-None-Match (or If-Modified-Since, on a single resource) gets a 304 without
+# the body ever being serialized.
+#----------------------------------------------------------------------------#
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime
+
+from flask import Response, request
+
+ALWAYS = ('id', 'updated_at')
+
+
+def encode_cursor(values):
+  payload = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+  return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, parsers):
+  # parsers turn each cursor value back into the type of its column; ValueError when malformed
+  try:
+    values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8'))
+  except (TypeError, UnicodeDecodeError, binascii.Error, json.JSONDecodeError) as error:
+    raise ValueError('malformed cursor: %s' % error)
+  if not isinstance(values, list) or len(values) != len(parsers):
+    raise ValueError('malformed cursor')
+  try:
+    return [parse(value) for parse, value in zip(parsers, values)]
+  except TypeError:
+    raise ValueError('malformed cursor')
+
+
+def parse_fields(requested, allowed):
+  # Field names for ?fields=a,b (all allowed fields when absent); id and updated_at are always included.
+  if not requested:
+    return list(ALWAYS) + list(allowed)
+  names = [name.strip() for name in requested.split(',') if name.strip()]
+  unknown = [name for name in names if name not in allowed and name not in ALWAYS]
+  if unknown:
+    raise ValueError('unknown fields: %s' % ', '.join(unknown))
+  return list(ALWAYS) + [name for name in dict.fromkeys(names) if name not in ALWAYS]
+
+
+def serialize(value):
+  if isinstance(value, (date, datetime)):
+    return value.isoformat()
+  return value
+
+
+def etag(kind, rows, fields, extra=''):
+  versions = ';'.join('%s@%s' % (row.id, serialize(row.updated_at)) for row in rows)
+  return hashlib.sha1(('%s|%s|%s|%s' % (kind, ','.join(fields), versions, extra)).encode('utf-8')).hexdigest()
+
+
+def not_modified(tag, modified):
+  # If-None-Match wins over If-Modified-Since when both are sent (RFC 7232 section 6)
+  if request.if_none_match:
+    return request.if_none_match.contains(tag)
+  if modified is not None and request.if_modified_since is not None:
+    return modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+  return False
+
+
+def conditional(tag, modified, build):
+  # 304 when the client's copy is current, otherwise the JSON built by build()
+  if not_modified(tag, modified):
+    response = Response(status=304)
+  else:
+    response = Response(json.dumps(build(), default=serialize), mimetype='application/json')
+  response.set_etag(tag)
+  if modified is not None:
+    response.last_modified = modified
+  #clients may keep the response but have to revalidate it before every use
+  response.headers['Cache-Control'] = 'no-cache'
+  return response
+
+
+def error(status, message):
+  return Response(json.dumps({"error": message}), status=status, mimetype='application/json')
@@ -0,0 +1,171 @@
+#----------------------------------------------------------------------------#
+# Artists: listing, search, genres, detail pages, create, edit and delete.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request
+
+from extensions import page_cache
+from forms import ArtistForm
+from models import (ARTIST_EDIT_FIELDS, Artist, Show, Venue, artist_genres, artist_with_shows, by_genre, db,
+  delete_entities, editable_row, fill_form, search_with_upcoming_counts, split_genres, set_genres, update_entity)
+from views import artist_changed, artist_created, delete_ids, edit_saved
+
+bp = Blueprint('artists', __name__)
+
+# -----------------------------------------------------------------
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@page_cache.cached('artists')
+def artists():
+  # TODO: replace with real data returned from querying the database
+  return render_template('pages/artists.html', artists=Artist.query.all())
+# -----------------------------------------------------------------
+#  SEARCH specific artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/search', methods=['POST'])
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+  search_term=request.form.get('search_term', '')
+  page=request.form.get('page', 1, type=int)
+  response=search_with_upcoming_counts(Artist, search_term, max(page, 1), current_app.config['SEARCH_RESULTS_PER_PAGE'])
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+# -----------------------------------------------------------------
+#  Artists by genre
+#  ----------------------------------------------------------------
+@bp.route('/artists/genres/<genre>')
+@page_cache.cached('artists_by_genre')
+def artists_by_genre(genre):
+  page = max(request.args.get('page', 1, type=int), 1)
+  results = by_genre(Artist, artist_genres, artist_genres.c.artist_id, genre, page, current_app.config['SEARCH_RESULTS_PER_PAGE'])
+  return render_template('pages/genre.html', genre=genre, results=results, kind='artists')
+# -----------------------------------------------------------------
+#  View specific artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>')
+@page_cache.cached('show_artist', 'artist_id')
+def show_artist(artist_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+  result = artist_with_shows(artist_id)
+  if result is None:
+    abort(404)
+  artist = result["entity"]
+
+  data = {
+    "id": artist.id,
+    "name": artist.name,
+    "genres": split_genres(artist.genres),
+    "city": artist.city,
+    "state": artist.state,
+    "phone": artist.phone,
+    "website": artist.website,
+    "facebook_link": artist.facebook_link,
+    "seeking_venue": artist.seeking_venue,
+    "image_link": artist.image_link,
+    "upcoming_shows": result["upcoming_shows"],
+    "past_shows": result["past_shows"],
+    "past_shows_count": result["past_shows_count"],
+    "upcoming_shows_count": result["upcoming_shows_count"]
+  }
+  return render_template('pages/show_artist.html', artist=data)
+# -----------------------------------------------------------------
+#  Update artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  artist = editable_row(Artist, artist_id, ARTIST_EDIT_FIELDS)
+  if artist is None:
+    abort(404)
+  form = ArtistForm()
+  fill_form(form, artist, ARTIST_EDIT_FIELDS)
+
+  # TODO: populate form with fields from artist with ID <artist_id>
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+  form = ArtistForm()
+  try:
+    result = update_entity(Artist, artist_genres, artist_genres.c.artist_id, artist_id, form, ARTIST_EDIT_FIELDS)
+  except:
+    db.session.rollback()
+    current_app.logger.exception('artist %s could not be updated', artist_id)
+    result = 'error'
+  finally:
+    db.session.close()
+  if result == 'updated':
+    artist_changed(artist_id)
+  return redirect(edit_saved(result, 'artist', artist_id))
+
+# -----------------------------------------------------------------
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  error = False
+  try:
+    current_app.logger.debug('artist form: %s', request.form.to_dict(flat=False))
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state =request.form.get('state')
+    genres =request.form.getlist('genres')
+    phone = request.form.get('phone')
+    image_link = request.form.get('image_link')
+    facebook_link =request.form.get('facebook_link')
+    artist = Artist(name=name, city=city, state=state, phone=phone, image_link=image_link, facebook_link=facebook_link)
+    set_genres(artist, genres)
+    db.session.add(artist)
+    db.session.commit()
+    artist_created()
+    # on successful db insert, flash success
+    flash('Artist ' + name + ' was successfully listed!')
+  except:
+    db.session.rollback()
+    error = True
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    flash('An error occurred. Artist ' + name + ' could not be listed.')
+    current_app.logger.exception('artist %s could not be listed', name)
+  finally:
+    db.session.close()
+  return render_template('pages/home.html')
+
+# -----------------------------------------------------------------
+# DELETE Artist
+#  ----------------------------------------------------------------
+@bp.route('/artists', methods=['DELETE'])
+@bp.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id=None):
+  # Deletes one artist, or many at once, with their shows; responds with the deleted counts.
+  # Nothing is flashed: the caller is a script, the message would show on some later page.
+  ids = delete_ids(artist_id)
+  try:
+    counts = delete_entities(Artist, Show.artist_id, Venue, Show.venue_id, ids)
+    db.session.commit()
+  except:
+    db.session.rollback()
+    current_app.logger.exception('artists %s could not be deleted', ids)
+    return jsonify({"error": "artists could not be deleted"}), 500
+  finally:
+    db.session.close()
+  if not counts["deleted"]:
+    return jsonify(counts), 404
+  for id in ids:
+    artist_changed(id)
+  return jsonify(counts)
+  # BONUS CHALLENGE: Implement a button to delete a artist on a artist Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
@@ -0,0 +1,131 @@
+#----------------------------------------------------------------------------#
+# ASGI entry point.
+#
+#   uvicorn asgi:application --port 5000
+#
+# The event loop accepts connections and reads and writes the sockets, slow
+# clients included; the (synchronous) Flask app runs on a pool of ASGI_THREADS
+# threads, so one worker overlaps that many requests waiting on the database.
+# asgiref's WsgiToAsgi would not: it runs every request on one shared thread,
+# hence this small adapter. The pool defaults to the worker's database
+# connections, as more threads would only queue on a connection checkout.
+#----------------------------------------------------------------------------#
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from app import create_app
+
+
+def pool_threads(config):
+  return config['ASGI_THREADS'] or config['DB_POOL_SIZE'] + config['DB_MAX_OVERFLOW']
+
+
+def build_environ(scope, body):
+  # The WSGI environ of an ASGI http request (PEP 3333, ASGI HTTP connection scope).
+  root_path = scope.get('root_path', '')
+  path = scope['path']
+  if root_path and path.startswith(root_path):
+    path = path[len(root_path):]
+  environ = {
+    "REQUEST_METHOD": scope['method'],
+    "SCRIPT_NAME": root_path.encode('utf-8').decode('latin-1'),
+    "PATH_INFO": path.encode('utf-8').decode('latin-1'),
+    "QUERY_STRING": scope['query_string'].decode('ascii'),
+    "SERVER_PROTOCOL": 'HTTP/%s' % scope['http_version'],
+    "wsgi.version": (1, 0),
+    "wsgi.url_scheme": scope.get('scheme', 'http'),
+    "wsgi.input": BytesIO(body),
+    "wsgi.errors": sys.stderr,
+    "wsgi.multithread": True,
+    "wsgi.multiprocess": True,
+    "wsgi.run_once": False,
+  }
+  server = scope.get('server') or ('localhost', 80)
+  environ['SERVER_NAME'], environ['SERVER_PORT'] = server[0], str(server[1] or 80)
+  if scope.get('client'):
+    environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+  for name, value in scope['headers']:
+    name = name.decode('latin-1')
+    if name == 'content-length':
+      key = 'CONTENT_LENGTH'
+    elif name == 'content-type':
+      key = 'CONTENT_TYPE'
+    else:
+      key = 'HTTP_' + name.upper().replace('-', '_')
+    value = value.decode('latin-1')
+    #repeated headers are joined, as a WSGI server does
+    environ[key] = environ[key] + ',' + value if key in environ else value
+  return environ
+
+
+class ThreadPoolWsgiToAsgi(object):
+
+  def __init__(self, wsgi_application, threads):
+    self.wsgi_application = wsgi_application
+    self.threads = threads
+    self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='fyyur-asgi')
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] == 'lifespan':
+      #nothing to start or stop, the app is ready once created
+      while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+          await send({"type": 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+          self.executor.shutdown(wait=True)
+          await send({"type": 'lifespan.shutdown.complete'})
+          return
+    if scope['type'] != 'http':
+      raise ValueError('cannot serve %s connections' % scope['type'])
+
+    body = bytearray()
+    while True:
+      message = await receive()
+      if message['type'] == 'http.disconnect':
+        return
+      body += message.get('body', b'')
+      if not message.get('more_body'):
+        break
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(self.executor, self.run_wsgi_app, loop, scope, bytes(body), send)
+
+  def run_wsgi_app(self, loop, scope, body, send):
+    # On a pool thread: calls the app and sends its response through the event loop, each
+    # chunk as the app yields it, so streamed pages go out while they are rendered.
+    def send_message(message):
+      asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+      if exc_info and response.get('started'):
+        raise exc_info[1].with_traceback(exc_info[2])
+      response['start'] = {"type": 'http.response.start', "status": int(status.split(' ', 1)[0]),
+        "headers": [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]}
+
+    def start():
+      #the status and headers may change until the first chunk of the body
+      if not response.get('started'):
+        send_message(response['start'])
+        response['started'] = True
+
+    result = self.wsgi_application(build_environ(scope, body), start_response)
+    try:
+      for chunk in result:
+        if chunk:
+          start()
+          send_message({"type": 'http.response.body', "body": chunk, "more_body": True})
+      start()
+      send_message({"type": 'http.response.body', "body": b''})
+    finally:
+      close = getattr(result, 'close', None)
+      if close is not None:
+        close()
+
+
+app = create_app()
+application = ThreadPoolWsgiToAsgi(app, pool_threads(app.config))
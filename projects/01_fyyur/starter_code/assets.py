@@ -0,0 +1,195 @@
+#----------------------------------------------------------------------------#
+# Static asset pipeline.
+#
+# `flask build-assets` joins the stylesheets and scripts of each bundle into
+# one minified file, copies images and fonts, and writes everything under a
+# name carrying a hash of its content (main.3f2a9c1d.css), with gzip and,
+# given the optional `brotli` package, brotli copies next to it. manifest.json
+# maps source names to built ones. Templates link assets with asset_url() and
+# asset_urls(): the built file once there is a manifest, the sources before.
+# A built name never changes content, so /assets/ serves it as immutable.
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import current_app, request, send_from_directory, url_for
+
+BUNDLES = {
+  'main.css': ('css/bootstrap.min.css', 'css/layout.main.css', 'css/main.css', 'css/main.responsive.css',
+    'css/main.quickfix.css'),
+  #blocking, in <head>
+  'head.js': ('js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'),
+  #deferred, in order after jQuery
+  'main.js': ('js/script.js', 'js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js'),
+}
+#static folders copied as they are under hashed names
+FINGERPRINTED = ('img', 'fonts')
+#(Content-Encoding, file suffix), preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE = ('.css', '.js', '.svg', '.otf', '.ttf', '.eot')
+
+CSS_COMMENTS = re.compile(r'/\*(?!!).*?\*/', re.S)
+CSS_SPACES = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,])\s*')
+CSS_URLS = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+SOURCE_MAPS = re.compile(r'^//[#@] sourceMappingURL=.*$', re.M)
+
+
+def minify_css(css):
+  css = CSS_COMMENTS.sub('', css)
+  css = CSS_SPACES.sub(' ', css)
+  css = CSS_PUNCTUATION.sub(r'\1', css)
+  return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+  # Most scripts come minified already; the rest are minified with rjsmin when it is installed.
+  js = SOURCE_MAPS.sub('', js)
+  try:
+    import rjsmin
+  except ImportError:
+    return js.strip()
+  return rjsmin.jsmin(js)
+
+
+def hashed_name(name, data):
+  root, ext = os.path.splitext(name)
+  return '%s.%s%s' % (root, hashlib.md5(data).hexdigest()[:8], ext)
+
+
+def compress(data):
+  # [(encoding, bytes)] for the encodings that save at least a tenth of the size
+  variants = [('gzip', gzip.compress(data, 9, mtime=0))]
+  try:
+    import brotli
+  except ImportError:
+    pass
+  else:
+    variants.append(('br', brotli.compress(data, quality=11)))
+  return [(encoding, compressed) for encoding, compressed in variants if len(compressed) < len(data) * 0.9]
+
+
+class AssetsState(object):
+  # the built assets of one app, as listed by the manifest in its ASSETS_DIR
+
+  def __init__(self, directory):
+    self.directory = directory
+    self.manifest = {}
+    self.encodings = {}
+    self.load()
+
+  def load(self):
+    try:
+      with open(os.path.join(self.directory, 'manifest.json')) as manifest:
+        built = json.load(manifest)
+    except (IOError, ValueError):
+      built = {}
+    self.manifest = built.get('assets', {})
+    self.encodings = built.get('encodings', {})
+
+
+class Assets(object):
+
+  def __init__(self, app=None):
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    # ASSETS_DIR holds the built files and their manifest, served under ASSETS_URL_PATH.
+    app.extensions['assets'] = AssetsState(app.config['ASSETS_DIR'])
+    app.add_url_rule(app.config['ASSETS_URL_PATH'] + '/<path:filename>', 'asset', self.send)
+    app.jinja_env.globals.update(asset_url=self.url, asset_urls=self.urls)
+
+  def url(self, name):
+    built = current_app.extensions['assets'].manifest.get(name)
+    if built is None:
+      return url_for('static', filename=name)
+    return url_for('asset', filename=built)
+
+  def urls(self, bundle):
+    # the built bundle, or each of its sources until assets are built
+    if bundle in current_app.extensions['assets'].manifest:
+      return [self.url(bundle)]
+    return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+  def send(self, filename):
+    state = current_app.extensions['assets']
+    accepted = state.encodings.get(filename, ())
+    for encoding, suffix in ENCODINGS:
+      if encoding in accepted and request.accept_encodings[encoding]:
+        response = send_from_directory(state.directory, filename + suffix,
+          mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['Content-Encoding'] = encoding
+        break
+    else:
+      response = send_from_directory(state.directory, filename)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=%d, immutable' % current_app.config['ASSETS_MAX_AGE']
+    return response
+
+  def build(self):
+    # Writes the bundles and fingerprinted files, then the manifest; returns the manifest.
+    # Files of earlier builds are kept for pages still linking them.
+    state = current_app.extensions['assets']
+    static = current_app.static_folder
+    manifest, encodings = {}, {}
+
+    def write(name, data):
+      built = hashed_name(name, data)
+      path = os.path.join(state.directory, built)
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      with open(path, 'wb') as output:
+        output.write(data)
+      if name.endswith(COMPRESSIBLE):
+        for encoding, compressed in compress(data):
+          with open(path + dict(ENCODINGS)[encoding], 'wb') as output:
+            output.write(compressed)
+          encodings.setdefault(built, []).append(encoding)
+      manifest[name] = built
+
+    for folder in FINGERPRINTED:
+      for root, _, files in os.walk(os.path.join(static, folder)):
+        for filename in sorted(files):
+          if filename.startswith('.'):
+            continue
+          path = os.path.join(root, filename)
+          with open(path, 'rb') as source:
+            write(os.path.relpath(path, static).replace(os.sep, '/'), source.read())
+
+    def rebase(source):
+      # url()s relative to a stylesheet, pointed at the built file or the static one
+      def url(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '/', '#')):
+          return match.group(0)
+        path, _, query = target.partition('?')
+        path = os.path.normpath(os.path.join(os.path.dirname(source), path)).replace(os.sep, '/')
+        if path in manifest:
+          target = current_app.config['ASSETS_URL_PATH'] + '/' + manifest[path]
+        else:
+          target = current_app.static_url_path + '/' + path
+        return 'url(%s%s%s%s)' % (quote, target, '?' + query if query else '', quote)
+      return url
+
+    for bundle, sources in sorted(BUNDLES.items()):
+      parts = []
+      for source in sources:
+        with open(os.path.join(static, source), encoding='utf-8') as text:
+          content = text.read()
+        if bundle.endswith('.css'):
+          parts.append(minify_css(CSS_URLS.sub(rebase(source), content)))
+        else:
+          parts.append(minify_js(content))
+      write(bundle, ('\n' if bundle.endswith('.css') else '\n;\n').join(parts).encode('utf-8'))
+
+    path = os.path.join(state.directory, 'manifest.json')
+    with open(path + '.tmp', 'w') as output:
+      json.dump({"assets": manifest, "encodings": encodings}, output, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+    state.manifest, state.encodings = manifest, encodings
+    return manifest
@@ -0,0 +1,153 @@
+#----------------------------------------------------------------------------#
+# Throughput of one sync worker and one ASGI worker as concurrency grows.
+#
+#   python benchmarks/generate.py --database-url sqlite:////tmp/fyyur_load.db
+#   python benchmarks/concurrency.py --database-url sqlite:////tmp/fyyur_load.db \
+#     --concurrency 1,8,32 --db-latency-ms 5
+#
+# Starts the app as a single process in each mode (sync: `python app.py`, the
+# threaded Werkzeug server; gunicorn: one gthread worker with as many threads
+# as the asgi mode; asgi: uvicorn serving asgi.py) and drives the read-heavy
+# routes at each concurrency level, reporting
+# throughput and p50/p95 latency. --db-latency-ms adds a sleep after every
+# statement, standing in for the round trip to a database on another host,
+# which a local SQLite file does not have.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description='Throughput of the sync and ASGI serving modes by concurrency.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+parser.add_argument('--modes', default='sync,gunicorn,asgi')
+parser.add_argument('--concurrency', default='1,8,32', help='comma separated concurrency levels')
+parser.add_argument('--requests', type=int, default=400, help='requests per mode and level')
+parser.add_argument('--db-latency-ms', type=float, default=0.0)
+parser.add_argument('--threads', type=int, default=0,
+  help='threads of the asgi and gunicorn modes, by default DB_POOL_SIZE + DB_MAX_OVERFLOW')
+parser.add_argument('--venues', type=int, default=2000, help='venue ids to pick from')
+parser.add_argument('--artists', type=int, default=5000, help='artist ids to pick from')
+parser.add_argument('--port', type=int, default=5099)
+parser.add_argument('--seed', type=int, default=42)
+parser.add_argument('--output', default='concurrency.json')
+args = parser.parse_args()
+
+SERVER = '''
+import sys, time
+sys.path.insert(0, %(here)r)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+if %(delay)r:
+  #every engine, the one asgi.py creates included
+  @event.listens_for(Engine, 'after_cursor_execute')
+  def round_trip(*args):
+    time.sleep(%(delay)r)
+
+if %(mode)r == 'asgi':
+  import uvicorn
+  uvicorn.run('asgi:application', port=%(port)d, log_level='warning')
+elif %(mode)r == 'gunicorn':
+  import config
+  from gunicorn.app.wsgiapp import run
+  threads = %(threads)d or config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW
+  sys.argv = ['gunicorn', '-c', 'gunicorn.conf.py', '--workers', '1', '--threads', str(threads),
+    '--bind', '127.0.0.1:%(port)d', '--log-level', 'warning', 'wsgi:app']
+  run()
+else:
+  #as python app.py runs it
+  from app import create_app
+  create_app().run(port=%(port)d, debug=False, use_reloader=False)
+'''
+
+
+def start(mode):
+  env = dict(os.environ, DATABASE_URL=args.database_url, QUERY_PROFILER='0', PAGE_CACHE='none',
+    LOG_LEVEL='WARNING', ACCESS_LOG_FILE='', ASGI_THREADS=str(args.threads))
+  code = SERVER % {"here": HERE, "delay": args.db_latency_ms / 1000, "mode": mode, "port": args.port,
+    "threads": args.threads}
+  server = subprocess.Popen([sys.executable, '-c', code], cwd=HERE, env=env,
+    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  deadline = time.time() + 30
+  while time.time() < deadline:
+    try:
+      socket.create_connection(('127.0.0.1', args.port), timeout=1).close()
+      return server
+    except OSError:
+      time.sleep(0.2)
+  server.kill()
+  raise SystemExit('%s server did not start on port %d' % (mode, args.port))
+
+
+def paths(rng, count):
+  choices = (
+    lambda: '/venues/%d' % rng.randint(1, args.venues),
+    lambda: '/artists/%d' % rng.randint(1, args.artists),
+    lambda: '/venues/%d/availability' % rng.randint(1, args.venues),
+    lambda: '/shows',
+    lambda: '/api/v1/venues?limit=50',
+  )
+  return [rng.choice(choices)() for _ in range(count)]
+
+
+def get(path):
+  start = time.perf_counter()
+  try:
+    with urllib.request.urlopen('http://127.0.0.1:%d%s' % (args.port, path)) as response:
+      response.read()
+      status = response.status
+  except urllib.error.HTTPError as error:
+    status = error.code
+  return (time.perf_counter() - start) * 1000, status
+
+
+def level(concurrency):
+  requests = paths(random.Random(args.seed), args.requests)
+  for path in requests[:concurrency]:
+    get(path)
+  started = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=concurrency) as pool:
+    results = list(pool.map(get, requests))
+  elapsed = time.perf_counter() - started
+  latencies = sorted(latency for latency, _ in results)
+  return {
+    "concurrency": concurrency,
+    "throughput_rps": round(len(results) / elapsed, 2),
+    "p50_ms": round(latencies[len(latencies) // 2], 3),
+    "p95_ms": round(latencies[int(len(latencies) * 0.95)], 3),
+    "errors": sum(1 for _, status in results if status >= 500),
+  }
+
+
+def main():
+  results = {"meta": {"db_latency_ms": args.db_latency_ms, "requests": args.requests}, "modes": {}}
+  for mode in args.modes.split(','):
+    server = start(mode)
+    try:
+      for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        result = level(concurrency)
+        results["modes"].setdefault(mode, []).append(result)
+        print('%-8s c=%-4d %8.1f req/s  p50 %8.2f ms  p95 %8.2f ms  errors %d' % (mode, concurrency,
+          result["throughput_rps"], result["p50_ms"], result["p95_ms"], result["errors"]))
+    finally:
+      server.terminate()
+      server.wait()
+
+  with open(args.output, 'w') as output:
+    json.dump(results, output, indent=2)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,101 @@
+#----------------------------------------------------------------------------#
+# Per-row cost of the `datetime` template filter on a 10k-row shows page.
+#
+#   python benchmarks/datetime_filter.py --rows 10000
+#
+# Compares the previous filter (dateutil parse + babel pattern resolution on
+# every call, so values had to be strings) with formatting.datetime_filter,
+# both on bare calls and rendering pages/shows.html. No database is needed.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description='Cost of the datetime filter per row of the shows page.')
+parser.add_argument('--rows', type=int, default=10000)
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--output', default='datetime_filter.json')
+args = parser.parse_args()
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates
+import dateutil.parser
+from app import create_app
+import formatting
+
+app = create_app()
+
+
+def legacy_format_datetime(value, format='medium'):
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format)
+
+
+def best_of(call):
+  timings = []
+  for _ in range(args.repeat):
+    start = time.perf_counter()
+    call()
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+
+def render(datetime_filter, rows, context):
+  # compiled templates bind their filters when loaded, so the template is reloaded per filter
+  environment = app.jinja_env
+  if environment.filters['datetime'] is not datetime_filter:
+    environment.filters['datetime'] = datetime_filter
+    environment.cache.clear()
+  return environment.get_template('pages/shows.html').render(shows=rows, **context)
+
+
+def shows(as_string):
+  start = datetime(2030, 1, 1, 20, 0)
+  return [{
+    "id": i,
+    "venue_id": 1,
+    "artist_id": 1,
+    "venue_name": "The Musical Hop",
+    "artist_name": "Guns N Petals",
+    "artist_image_link": "https://example.com/a.jpg",
+    "start_time": str(start + timedelta(hours=i)) if as_string else start + timedelta(hours=i)
+  } for i in range(args.rows)]
+
+
+def main():
+  results = {"rows": args.rows}
+  with app.test_request_context('/shows'):
+    strings = [row["start_time"] for row in shows(True)]
+    values = [row["start_time"] for row in shows(False)]
+    assert legacy_format_datetime(strings[0], 'full') == formatting.datetime_filter(values[0], 'full')
+    results["call_legacy_us"] = best_of(lambda: [legacy_format_datetime(value, 'full') for value in strings]) / args.rows * 1e6
+    results["call_cached_us"] = best_of(lambda: [formatting.datetime_filter(value, 'full') for value in values]) / args.rows * 1e6
+
+    #a page one row longer than the data, so that no "More shows" link is rendered
+    context = {"per_page": args.rows + 1, "stream": False}
+    app.update_template_context(context)
+    legacy_rows, rows = shows(True), shows(False)
+
+    results["page_legacy_us"] = best_of(lambda: render(legacy_format_datetime, legacy_rows, context)) / args.rows * 1e6
+    results["page_cached_us"] = best_of(lambda: render(formatting.datetime_filter, rows, context)) / args.rows * 1e6
+
+  for key in ("call_legacy_us", "call_cached_us", "page_legacy_us", "page_cached_us"):
+    results[key] = round(results[key], 2)
+    print('%-16s %8.2f us/row' % (key, results[key]))
+  with open(args.output, 'w') as output:
+    json.dump(results, output, indent=2)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
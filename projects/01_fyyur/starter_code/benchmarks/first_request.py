@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# Latency of the first requests of a fresh worker, by template compile mode.
+#
+#   python benchmarks/generate.py --database-url sqlite:////tmp/fyyur_load.db
+#   python benchmarks/first_request.py --database-url sqlite:////tmp/fyyur_load.db
+#
+# Each run starts a new process, creates the app and times its first and
+# second request to each page: without the bytecode cache (every template
+# compiled on first use), with a warm bytecode cache, and with the cache plus
+# TEMPLATE_PRECOMPILE (templates loaded at startup, which the startup time
+# then includes). A JSON request goes first, so that the first connection to
+# the database is not counted against a page. Medians of --runs processes.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description='First request latency of a fresh worker by template compile mode.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+parser.add_argument('--runs', type=int, default=5)
+parser.add_argument('--output', default='first_request.json')
+args = parser.parse_args()
+
+PAGES = ['/', '/venues', '/venues/1', '/artists/1', '/shows', '/venues/create', '/artists/1/edit']
+
+MODES = (
+  ('no bytecode cache', {"TEMPLATE_BYTECODE_CACHE": '0', "TEMPLATE_PRECOMPILE": '0'}),
+  ('bytecode cache', {"TEMPLATE_BYTECODE_CACHE": '1', "TEMPLATE_PRECOMPILE": '0'}),
+  ('bytecode cache + precompile', {"TEMPLATE_BYTECODE_CACHE": '1', "TEMPLATE_PRECOMPILE": '1'}),
+)
+
+WORKER = '''
+import gc, json, sys, time, warnings
+warnings.simplefilter('ignore')
+sys.path.insert(0, %(here)r)
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+timings = {"startup": (time.perf_counter() - started) * 1000}
+client = app.test_client()
+#the first request and database connection cost the same in every mode; a JSON route takes them
+client.get('/api/v1/venues?limit=1').close()
+#a collection would land on whichever request happens to trigger it
+gc.disable()
+for path in %(pages)r:
+  for attempt in ('first', 'second'):
+    started = time.perf_counter()
+    client.get(path).close()
+    timings['%%s %%s' %% (attempt, path)] = (time.perf_counter() - started) * 1000
+print(json.dumps(timings))
+'''
+
+
+def worker(env):
+  code = WORKER % {"here": HERE, "pages": PAGES}
+  output = subprocess.check_output([sys.executable, '-c', code], cwd=HERE, env=env, stderr=subprocess.DEVNULL)
+  return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+  cache_dir = tempfile.mkdtemp(prefix='fyyur-jinja-')
+  base = dict(os.environ, DATABASE_URL=args.database_url, QUERY_PROFILER='0', PAGE_CACHE='none',
+    TEMPLATE_CACHE_DIR=cache_dir)
+  #fills the bytecode cache, as `flask compile-templates` does on deploy
+  worker(dict(base, TEMPLATE_PRECOMPILE='1'))
+
+  results = {}
+  for mode, settings in MODES:
+    runs = [worker(dict(base, **settings)) for _ in range(args.runs)]
+    results[mode] = dict((key, round(statistics.median(run[key] for run in runs), 2)) for key in runs[0])
+
+  print('%-22s' % '' + ''.join('%30s' % mode for mode, _ in MODES))
+  for key in results[MODES[0][0]]:
+    print('%-22s' % key + ''.join('%27.1f ms' % results[mode][key] for mode, _ in MODES))
+  with open(args.output, 'w') as output:
+    json.dump(results, output, indent=2)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,147 @@
+#----------------------------------------------------------------------------#
+# Synthetic Fyyur data for benchmarks.
+#
+#   python benchmarks/generate.py --database-url sqlite:////tmp/fyyur_load.db \
+#     --venues 2000 --artists 5000 --shows 200000
+#
+# Migrates the database to the latest revision, then fills it with venues and
+# artists (searchable names, real cities, genres from the forms) and shows
+# spread over two years around now, through the same set-based writers as the
+# bulk import. The same seed gives the same data. A database that already has
+# shows is left alone unless --reset is given.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ('Blue', 'Velvet', 'Electric', 'Golden', 'Midnight', 'Hollow', 'Silver', 'Wild', 'Crimson', 'Lucky',
+  'Echo', 'Neon', 'Rusty', 'Copper', 'Lunar', 'Static', 'Iron', 'Honey', 'Paper', 'Glass')
+VENUE_NOUNS = ('Room', 'Hall', 'Lounge', 'Tavern', 'Club', 'Stage', 'Garden', 'Cellar', 'Theatre', 'Hop')
+ARTIST_NOUNS = ('Band', 'Collective', 'Quartet', 'Sisters', 'Brothers', 'Kids', 'Orchestra', 'Trio', 'Petals', 'Sax')
+CITIES = (('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'), ('Brooklyn', 'NY'), ('Austin', 'TX'),
+  ('Houston', 'TX'), ('Seattle', 'WA'), ('Portland', 'OR'), ('Chicago', 'IL'), ('Nashville', 'TN'),
+  ('New Orleans', 'LA'), ('Denver', 'CO'), ('Boston', 'MA'), ('Atlanta', 'GA'), ('Miami', 'FL'))
+
+CHUNK = 5000
+
+
+def options(argv=None):
+  parser = argparse.ArgumentParser(description='Fill a database with synthetic venues, artists and shows.')
+  parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+  parser.add_argument('--venues', type=int, default=2000)
+  parser.add_argument('--artists', type=int, default=5000)
+  parser.add_argument('--shows', type=int, default=200000)
+  parser.add_argument('--seed', type=int, default=42)
+  parser.add_argument('--reset', action='store_true', help='delete existing venues, artists and shows first')
+  return parser.parse_args(argv)
+
+
+def load_app(database_url):
+  # The app reads DATABASE_URL when it is created.
+  os.environ['DATABASE_URL'] = database_url
+  if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+  from app import create_app
+  return create_app()
+
+
+def genre_names():
+  from forms import VenueForm
+  return [value for value, _ in VenueForm.genres.kwargs['choices']]
+
+
+def entity_rows(rng, count, nouns, genres, extra):
+  for i in range(count):
+    city, state = rng.choice(CITIES)
+    row = {
+      "name": '%s %s %s %d' % (rng.choice(WORDS), rng.choice(WORDS), rng.choice(nouns), i),
+      "city": city,
+      "state": state,
+      "phone": '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+      "genres": ','.join(rng.sample(genres, rng.randint(1, 3))),
+      "image_link": 'https://images.example.com/%d.jpg' % i,
+      "facebook_link": 'https://www.facebook.com/fyyur%d' % i,
+    }
+    row.update(extra(i))
+    yield row
+
+
+def chunks(rows, size=CHUNK):
+  chunk = []
+  for line, row in enumerate(rows, 1):
+    chunk.append((line, row))
+    if len(chunk) >= size:
+      yield chunk
+      chunk = []
+  if chunk:
+    yield chunk
+
+
+def populate(app, venues, artists, shows, seed=42, reset=False, log=print):
+  # Returns the number of venues, artists and shows in the database afterwards.
+  import flask_migrate
+  from app import init_migrations
+  from models import db, Venue, Artist, Show, venue_genres, artist_genres, import_entity_chunk, recount_shows
+  if 'migrate' not in app.extensions:
+    init_migrations(app)
+  with app.app_context():
+    flask_migrate.upgrade(directory=os.path.join(HERE, 'migrations'))
+    if reset:
+      db.session.query(Venue).delete(synchronize_session=False)
+      db.session.query(Artist).delete(synchronize_session=False)
+      db.session.commit()
+    if db.session.query(Show.id).first() is None:
+      rng = random.Random(seed)
+      genres = genre_names()
+      started = time.perf_counter()
+      log('generating %d venues, %d artists, %d shows' % (venues, artists, shows))
+      write_venues = import_entity_chunk(Venue, venue_genres, venue_genres.c.venue_id)
+      for chunk in chunks(entity_rows(rng, venues, VENUE_NOUNS, genres, lambda i: {
+          "address": '%d %s Street' % (rng.randint(1, 2000), rng.choice(WORDS)),
+          "seeking_talent": rng.random() < 0.3})):
+        write_venues(chunk)
+      write_artists = import_entity_chunk(Artist, artist_genres, artist_genres.c.artist_id)
+      for chunk in chunks(entity_rows(rng, artists, ARTIST_NOUNS, genres, lambda i: {
+          "seeking_venue": rng.random() < 0.3})):
+        write_artists(chunk)
+
+      venue_ids = [id for (id,) in db.session.query(Venue.id)]
+      artist_ids = [id for (id,) in db.session.query(Artist.id)]
+      now = datetime.now().replace(second=0, microsecond=0)
+      for start in range(0, shows, CHUNK):
+        db.session.execute(Show.__table__.insert(), [{
+          "venue_id": rng.choice(venue_ids),
+          "artist_id": rng.choice(artist_ids),
+          "start_time": now + timedelta(minutes=30 * rng.randint(-17520, 17520)),
+        } for _ in range(start, min(start + CHUNK, shows))])
+        db.session.commit()
+      #the counters are recounted once at the end rather than per chunk of shows
+      for ids, model, show_fk in ((venue_ids, Venue, Show.venue_id), (artist_ids, Artist, Show.artist_id)):
+        for start in range(0, len(ids), CHUNK):
+          recount_shows(model, show_fk, ids[start:start + CHUNK])
+      db.session.commit()
+      log('generated in %.1f s' % (time.perf_counter() - started))
+    counts = {
+      "venues": db.session.query(Venue.id).count(),
+      "artists": db.session.query(Artist.id).count(),
+      "shows": db.session.query(Show.id).count(),
+    }
+    db.session.remove()
+  return counts
+
+
+def main():
+  args = options()
+  app = load_app(args.database_url)
+  counts = populate(app, args.venues, args.artists, args.shows, args.seed, args.reset)
+  print('%(venues)d venues, %(artists)d artists, %(shows)d shows' % counts)
+
+
+if __name__ == '__main__':
+  main()
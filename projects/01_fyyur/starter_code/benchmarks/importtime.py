@@ -0,0 +1,117 @@
+#----------------------------------------------------------------------------#
+# Cold start of a worker and of a CLI command, with `python -X importtime`.
+#
+#   python benchmarks/importtime.py --database-url sqlite:////tmp/fyyur_load.db
+#   python benchmarks/importtime.py --compare importtime.json
+#
+# Each scenario runs --runs times in a fresh interpreter: importing app.py,
+# creating the app as a worker does before it serves (import included), and
+# `flask routes`, a CLI command that loads the app and leaves the database
+# alone. Reported per scenario: the median wall time of the process, the
+# median time spent importing, and the packages that took longest to import.
+# With --compare, an earlier result file (e.g. from the previous revision) is
+# printed next to this one.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description='Import time and cold start of a worker and of a CLI command.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+parser.add_argument('--runs', type=int, default=10)
+parser.add_argument('--top', type=int, default=8, help='slowest packages listed per scenario')
+parser.add_argument('--output', default='importtime.json')
+parser.add_argument('--compare', help='earlier result file to print next to this run')
+args = parser.parse_args()
+
+#a tree from before the app factory builds its app on import
+WORKER = '''
+import app
+if hasattr(app, 'create_app'):
+  app.create_app()
+'''
+
+SCENARIOS = (
+  ('import app', ['-c', 'import app']),
+  ('worker', ['-c', WORKER]),
+  ('flask routes', ['-m', 'flask', 'routes']),
+)
+
+
+def imports(stderr):
+  # {package: cumulative us} from the -X importtime lines; a package is imported once, where
+  # it is first needed, so the cumulative times of packages nested in others overlap
+  packages = {}
+  total = 0
+  for line in stderr.splitlines():
+    if not line.startswith('import time:') or 'cumulative' in line:
+      continue
+    _, cumulative, name = line[len('import time:'):].split('|')
+    if not name.startswith('  '):
+      total += int(cumulative)
+    name = name.strip()
+    if '.' not in name:
+      packages[name] = int(cumulative)
+  return total, packages
+
+
+def run(command, env):
+  started = time.perf_counter()
+  process = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=HERE, env=env,
+    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+  wall = (time.perf_counter() - started) * 1000
+  if process.returncode:
+    raise SystemExit('%s failed:\n%s' % (' '.join(command), process.stderr[-2000:]))
+  total, packages = imports(process.stderr)
+  return wall, total / 1000, packages
+
+
+def scenario(command, env):
+  runs = [run(command, env) for _ in range(args.runs)]
+  packages = defaultdict(list)
+  for _, _, imported in runs:
+    for name, us in imported.items():
+      packages[name].append(us / 1000)
+  slowest = sorted(((name, statistics.median(ms)) for name, ms in packages.items()), key=lambda item: -item[1])
+  return {
+    "wall_ms": round(statistics.median(wall for wall, _, _ in runs), 1),
+    "import_ms": round(statistics.median(total for _, total, _ in runs), 1),
+    "slowest_imports_ms": dict((name, round(ms, 1)) for name, ms in slowest[:args.top]),
+  }
+
+
+def main():
+  env = dict(os.environ, DATABASE_URL=args.database_url, FLASK_APP='app.py', QUERY_PROFILER='0',
+    PYTHONWARNINGS='ignore')
+  #the first process fills the bytecode caches, of the modules and of the templates
+  run(SCENARIOS[1][1], env)
+  baseline = None
+  if args.compare:
+    with open(args.compare) as earlier:
+      baseline = json.load(earlier)
+
+  results = {}
+  for name, command in SCENARIOS:
+    result = results[name] = scenario(command, env)
+    line = '%-14s wall %8.1f ms  imports %8.1f ms' % (name, result["wall_ms"], result["import_ms"])
+    before = baseline.get(name) if baseline else None
+    if before:
+      line += '   (before: wall %8.1f ms  imports %8.1f ms)' % (before["wall_ms"], before["import_ms"])
+    print(line)
+    print('  ' + ', '.join('%s %.1f' % item for item in result["slowest_imports_ms"].items()))
+
+  with open(args.output, 'w') as output:
+    json.dump(results, output, indent=2)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
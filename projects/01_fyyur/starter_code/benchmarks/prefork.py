@@ -0,0 +1,142 @@
+#----------------------------------------------------------------------------#
+# Latency while gunicorn scales out, with cold and with preloaded workers.
+#
+#   python benchmarks/generate.py --database-url sqlite:////tmp/fyyur_load.db
+#   python benchmarks/prefork.py --database-url sqlite:////tmp/fyyur_load.db --add 3
+#
+# Starts gunicorn (gunicorn.conf.py) with one worker, in each mode: cold
+# (PRELOAD=0, every worker imports and creates the app itself) and preload.
+# Clients request detail pages, /shows and the API for --settle seconds, then
+# --add workers are added (SIGTTIN) while the load goes on for --duration
+# seconds. Reported: the latency percentiles before and after the scale-out,
+# and how many requests took longer than --spike-ms, the cold-start spikes.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description='Latency while gunicorn adds cold or preloaded workers.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+parser.add_argument('--modes', default='cold,preload')
+parser.add_argument('--add', type=int, default=3, help='workers added during the run')
+parser.add_argument('--concurrency', type=int, default=4)
+parser.add_argument('--settle', type=float, default=3.0, help='seconds of load before the scale-out')
+parser.add_argument('--duration', type=float, default=10.0, help='seconds of load after it')
+parser.add_argument('--spike-ms', type=float, default=100.0)
+parser.add_argument('--venues', type=int, default=2000, help='venue ids to pick from')
+parser.add_argument('--artists', type=int, default=5000, help='artist ids to pick from')
+parser.add_argument('--port', type=int, default=5098)
+parser.add_argument('--seed', type=int, default=42)
+parser.add_argument('--output', default='prefork.json')
+args = parser.parse_args()
+
+
+def start(mode):
+  env = dict(os.environ, DATABASE_URL=args.database_url, PRELOAD='1' if mode == 'preload' else '0',
+    WEB_CONCURRENCY='1', GUNICORN_BIND='127.0.0.1:%d' % args.port, QUERY_PROFILER='0', PAGE_CACHE='none',
+    PYTHONWARNINGS='ignore')
+  server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=HERE,
+    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  deadline = time.time() + 60
+  while time.time() < deadline:
+    try:
+      get('/')
+      return server
+    except OSError:
+      time.sleep(0.2)
+  server.kill()
+  raise SystemExit('gunicorn did not start on port %d' % args.port)
+
+
+def get(path):
+  try:
+    with urllib.request.urlopen('http://127.0.0.1:%d%s' % (args.port, path), timeout=30) as response:
+      response.read()
+      return response.status
+  except urllib.error.HTTPError as error:
+    return error.code
+
+
+def client(rng, stop, results):
+  choices = (
+    lambda: '/venues/%d' % rng.randint(1, args.venues),
+    lambda: '/artists/%d' % rng.randint(1, args.artists),
+    lambda: '/shows',
+    lambda: '/api/v1/venues?limit=20',
+  )
+  while not stop.is_set():
+    path = rng.choice(choices)()
+    started = time.perf_counter()
+    status = get(path)
+    results.append((started, (time.perf_counter() - started) * 1000, status))
+
+
+def summary(latencies):
+  latencies = sorted(latencies)
+  if not latencies:
+    return {}
+  return {
+    "requests": len(latencies),
+    "p50_ms": round(statistics.median(latencies), 2),
+    "p99_ms": round(latencies[int(len(latencies) * 0.99)], 2),
+    "max_ms": round(latencies[-1], 2),
+    "spikes": sum(1 for latency in latencies if latency > args.spike_ms),
+  }
+
+
+def run(mode):
+  server = start(mode)
+  try:
+    #the first worker is warm in both modes before the clock starts
+    for _ in range(20):
+      get('/venues/1')
+    stop, results = threading.Event(), []
+    clients = [threading.Thread(target=client, args=(random.Random('%s:%d' % (args.seed, i)), stop, results))
+      for i in range(args.concurrency)]
+    for thread in clients:
+      thread.start()
+    time.sleep(args.settle)
+    scaled_at = time.perf_counter()
+    for _ in range(args.add):
+      server.send_signal(signal.SIGTTIN)
+    time.sleep(args.duration)
+    stop.set()
+    for thread in clients:
+      thread.join()
+  finally:
+    server.terminate()
+    server.wait()
+  return {
+    "before": summary([latency for started, latency, _ in results if started < scaled_at]),
+    "after": summary([latency for started, latency, _ in results if started >= scaled_at]),
+    "errors": sum(1 for _, _, status in results if status >= 500),
+  }
+
+
+def main():
+  report = {"meta": {"add": args.add, "concurrency": args.concurrency, "spike_ms": args.spike_ms}, "modes": {}}
+  for mode in args.modes.split(','):
+    result = report["modes"][mode] = run(mode)
+    for phase in ('before', 'after'):
+      numbers = result[phase]
+      print('%-8s %-6s %6d requests  p50 %8.2f ms  p99 %8.2f ms  max %8.2f ms  over %.0f ms: %d' % (mode, phase,
+        numbers["requests"], numbers["p50_ms"], numbers["p99_ms"], numbers["max_ms"], args.spike_ms, numbers["spikes"]))
+  with open(args.output, 'w') as output:
+    json.dump(report, output, indent=2)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# Throughput and latency percentiles of every Fyyur route.
+#
+#   python benchmarks/generate.py --database-url sqlite:////tmp/fyyur_load.db
+#   python benchmarks/routes.py --database-url sqlite:////tmp/fyyur_load.db \
+#     --requests 500 --concurrency 4 --output routes.json
+#   python benchmarks/routes.py --url http://localhost:5000 --compare routes.json
+#
+# Each route is warmed up, then requested --requests times from --concurrency
+# threads, either in process through the Flask test client (the default, on the
+# database the generator filled; the page cache is off unless --page-cache) or
+# over HTTP against a running server (--url). Per route: throughput, p50/p95/p99
+# latency and response statuses, printed and written as JSON. With --compare,
+# the run is checked against an earlier result file and the script exits with
+# status 1 when a route's p95 got worse by more than --max-regression percent.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate
+
+parser = argparse.ArgumentParser(description='Throughput and latency percentiles of the Fyyur routes.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_load.db'))
+parser.add_argument('--url', help='benchmark a running server instead of the app in process')
+parser.add_argument('--venues', type=int, default=2000, help='venue ids to pick from over --url')
+parser.add_argument('--artists', type=int, default=5000, help='artist ids to pick from over --url')
+parser.add_argument('--routes', help='comma separated route names, all by default')
+parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+parser.add_argument('--warmup', type=int, default=10, help='untimed requests per route first')
+parser.add_argument('--concurrency', type=int, default=1)
+parser.add_argument('--seed', type=int, default=42)
+parser.add_argument('--page-cache', action='store_true', help='keep the page cache on (in process)')
+parser.add_argument('--output', default='routes.json')
+parser.add_argument('--compare', help='earlier result file to compare with')
+parser.add_argument('--max-regression', type=float, default=20.0, help='allowed p95 increase, in percent')
+args = parser.parse_args()
+
+
+#(name, method, path, form data) with path and data drawn per request
+def scenarios(venues, artists):
+  words = [word.lower() for word in generate.WORDS]
+  def venue_id(rng):
+    return rng.randint(1, venues)
+  def artist_id(rng):
+    return rng.randint(1, artists)
+  def later(rng):
+    return (datetime.now() + timedelta(days=rng.randint(800, 4000), minutes=30 * rng.randint(0, 47))).strftime('%Y-%m-%d %H:%M:%S')
+  return [
+    ('home', 'GET', lambda rng: '/', None),
+    ('venues', 'GET', lambda rng: '/venues', None),
+    ('venue_detail', 'GET', lambda rng: '/venues/%d' % venue_id(rng), None),
+    ('venue_availability', 'GET', lambda rng: '/venues/%d/availability' % venue_id(rng), None),
+    ('venues_by_genre', 'GET', lambda rng: '/venues/genres/Jazz', None),
+    ('search_venues', 'POST', lambda rng: '/venues/search', lambda rng: {"search_term": rng.choice(words)}),
+    ('artists', 'GET', lambda rng: '/artists', None),
+    ('artist_detail', 'GET', lambda rng: '/artists/%d' % artist_id(rng), None),
+    ('search_artists', 'POST', lambda rng: '/artists/search', lambda rng: {"search_term": rng.choice(words)}),
+    ('shows', 'GET', lambda rng: '/shows', None),
+    ('api_venues', 'GET', lambda rng: '/api/v1/venues?limit=50', None),
+    ('api_shows', 'GET', lambda rng: '/api/v1/shows?venue_id=%d' % venue_id(rng), None),
+    ('create_venue', 'POST', lambda rng: '/venues/create', lambda rng: {
+      "name": 'Bench Venue %d' % rng.randint(0, 10 ** 9), "city": 'Austin', "state": 'TX',
+      "address": '1 Main Street', "phone": '512-555-0100', "genres": ['Jazz', 'Blues'],
+      "facebook_link": 'https://www.facebook.com/bench'}),
+    ('edit_venue', 'POST', lambda rng: '/venues/%d/edit' % venue_id(rng), lambda rng: {
+      "name": 'Edited Venue %d' % rng.randint(0, 10 ** 9), "city": 'Austin', "state": 'TX',
+      "genres": ['Jazz']}),
+    ('create_show', 'POST', lambda rng: '/shows/create', lambda rng: {
+      "venue_id": venue_id(rng), "artist_id": artist_id(rng), "start_time": later(rng), "duration": 90}),
+  ]
+
+
+class InProcess(object):
+
+  def __init__(self, app):
+    self.app = app
+    self.local = threading.local()
+
+  def request(self, method, path, data):
+    #one client per thread: each keeps its own session cookie
+    client = getattr(self.local, 'client', None)
+    if client is None:
+      client = self.local.client = self.app.test_client()
+    response = client.open(path, method=method, data=data)
+    response.close()
+    return response.status_code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+
+  def redirect_request(self, *args, **kwargs):
+    return None
+
+
+class Http(object):
+
+  def __init__(self, url):
+    self.url = url.rstrip('/')
+    self.opener = urllib.request.build_opener(NoRedirect())
+
+  def request(self, method, path, data):
+    body = urllib.parse.urlencode(data, doseq=True).encode('utf-8') if data is not None else None
+    try:
+      with self.opener.open(urllib.request.Request(self.url + path, data=body, method=method)) as response:
+        response.read()
+        return response.status
+    except urllib.error.HTTPError as error:
+      return error.code
+
+
+def percentile(ordered, share):
+  return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+
+def run(driver, scenario):
+  name, method, path, data = scenario
+  rng = random.Random('%s:%s' % (args.seed, name))
+  #requests are drawn up front so that every run sends the same ones
+  calls = [(path(rng), data(rng) if data else None) for _ in range(args.warmup + args.requests)]
+  for call in calls[:args.warmup]:
+    driver.request(method, *call)
+
+  def timed(call):
+    start = time.perf_counter()
+    status = driver.request(method, *call)
+    return (time.perf_counter() - start) * 1000, status
+
+  started = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+    results = list(pool.map(timed, calls[args.warmup:]))
+  elapsed = time.perf_counter() - started
+
+  latencies = sorted(latency for latency, _ in results)
+  statuses = Counter(status for _, status in results)
+  return {
+    "method": method,
+    "requests": len(results),
+    "errors": sum(count for status, count in statuses.items() if status >= 500),
+    "statuses": dict((str(status), count) for status, count in sorted(statuses.items())),
+    "throughput_rps": round(len(results) / elapsed, 2),
+    "mean_ms": round(statistics.mean(latencies), 3),
+    "p50_ms": round(percentile(latencies, 0.50), 3),
+    "p95_ms": round(percentile(latencies, 0.95), 3),
+    "p99_ms": round(percentile(latencies, 0.99), 3),
+    "max_ms": round(latencies[-1], 3),
+  }
+
+
+def git_revision():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=generate.HERE,
+      stderr=subprocess.DEVNULL).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def compare(report, baseline):
+  # Prints p95 and throughput changes per route; returns the routes whose p95 regressed.
+  regressed = []
+  print('\n%-20s %12s %12s %9s %12s' % ('route', 'p95 before', 'p95 now', 'change', 'rps change'))
+  for name, now in report["routes"].items():
+    before = baseline["routes"].get(name)
+    if before is None:
+      continue
+    change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+    rps_change = (now["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100 \
+      if before["throughput_rps"] else 0.0
+    flag = '  REGRESSION' if change > args.max_regression else ''
+    print('%-20s %9.2f ms %9.2f ms %+8.1f%% %+11.1f%%%s' % (name, before["p95_ms"], now["p95_ms"], change, rps_change, flag))
+    if flag:
+      regressed.append(name)
+  return regressed
+
+
+def main():
+  #read before anything is written: --compare may name the --output file of the previous run
+  baseline = None
+  if args.compare:
+    with open(args.compare) as earlier:
+      baseline = json.load(earlier)
+  meta = {
+    "started": datetime.now().isoformat(timespec='seconds'),
+    "revision": git_revision(),
+    "python": platform.python_version(),
+    "requests": args.requests,
+    "concurrency": args.concurrency,
+  }
+  if args.url:
+    driver = Http(args.url)
+    venues, artists = args.venues, args.artists
+    meta.update({"target": args.url})
+  else:
+    #profiling would be measured along with the routes
+    os.environ.setdefault('QUERY_PROFILER', '0')
+    if not args.page_cache:
+      os.environ['PAGE_CACHE'] = 'none'
+    app = generate.load_app(args.database_url)
+    counts = generate.populate(app, args.venues, args.artists, generate.options([]).shows)
+    venues, artists = counts["venues"], counts["artists"]
+    #per-request debug logging would be too
+    app.logger.setLevel(logging.WARNING)
+    driver = InProcess(app)
+    with app.app_context():
+      from models import db
+      meta.update({"target": 'in process', "database": db.engine.dialect.name, "page_cache": args.page_cache})
+    meta.update(counts)
+
+  selected = set(args.routes.split(',')) if args.routes else None
+  report = {"meta": meta, "routes": {}}
+  for scenario in scenarios(venues, artists):
+    if selected is not None and scenario[0] not in selected:
+      continue
+    result = report["routes"][scenario[0]] = run(driver, scenario)
+    print('%-20s %8.1f req/s  p50 %8.2f ms  p95 %8.2f ms  p99 %8.2f ms  %s' % (scenario[0],
+      result["throughput_rps"], result["p50_ms"], result["p95_ms"], result["p99_ms"], result["statuses"]))
+
+  with open(args.output, 'w') as output:
+    json.dump(report, output, indent=2)
+  print('written to %s' % args.output)
+
+  if baseline is not None:
+    regressed = compare(report, baseline)
+    if regressed:
+      print('p95 regressed by more than %.0f%%: %s' % (args.max_regression, ', '.join(regressed)))
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
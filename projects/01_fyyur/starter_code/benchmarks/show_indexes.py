@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------#
+# Query plans and latencies of the Show hot paths without and with the
+# ix_Show_* indexes (migration e7a3b5f08c21).
+#
+#   python benchmarks/show_indexes.py --database-url sqlite:////tmp/fyyur_bench.db --shows 1000000
+#
+# The database is filled with synthetic venues, artists and shows the first time
+# (an existing Show table is reused as is), the indexes are dropped, every query
+# is explained and timed, then the indexes are created and the same queries are
+# explained and timed again. Results are printed and written as JSON.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description='Show hot-path query plans and latencies without and with the Show indexes.')
+parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', 'sqlite:////tmp/fyyur_bench.db'))
+parser.add_argument('--venues', type=int, default=2000)
+parser.add_argument('--artists', type=int, default=5000)
+parser.add_argument('--shows', type=int, default=1000000)
+parser.add_argument('--repeat', type=int, default=50, help='timed runs per query')
+parser.add_argument('--output', default='show_indexes.json')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = args.database_url
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, inspect
+import models
+from app import create_app
+from models import db, Venue, Artist, Show
+
+CHUNK = 10000
+
+
+def populate():
+  if db.session.query(Show.id).first() is not None:
+    return
+  random.seed(42)
+  print('generating %d venues, %d artists, %d shows' % (args.venues, args.artists, args.shows))
+  db.session.execute(Venue.__table__.insert(), [
+    {"name": "Venue %d" % i, "city": "City %d" % (i % 200), "state": "CA", "genres": "Jazz"}
+    for i in range(args.venues)])
+  db.session.execute(Artist.__table__.insert(), [
+    {"name": "Artist %d" % i, "city": "City %d" % (i % 200), "state": "CA", "genres": "Jazz"}
+    for i in range(args.artists)])
+  now = datetime.now()
+  for start in range(0, args.shows, CHUNK):
+    db.session.execute(Show.__table__.insert(), [{
+      "venue_id": random.randint(1, args.venues),
+      "artist_id": random.randint(1, args.artists),
+      "start_time": now + timedelta(minutes=random.randint(-525600, 525600))
+    } for _ in range(start, min(start + CHUNK, args.shows))])
+    db.session.commit()
+
+
+def hot_paths():
+  middle = db.session.query(Show.start_time, Show.id).order_by(Show.id).offset(args.shows // 2).first()
+  return {
+    "venue detail": lambda: models.venue_with_shows(random.randint(1, args.venues)),
+    "artist detail": lambda: models.artist_with_shows(random.randint(1, args.artists)),
+    "shows page": lambda: models.shows_page(tuple(middle), 30).all(),
+  }
+
+
+def statements_of(call):
+  # the SQL and parameters a hot path sends, to be explained as is
+  statements = []
+  def record(conn, cursor, statement, parameters, context, executemany):
+    statements.append((statement, parameters))
+  event.listen(db.engine, 'before_cursor_execute', record)
+  try:
+    call()
+  finally:
+    event.remove(db.engine, 'before_cursor_execute', record)
+  return statements
+
+
+def explain(statement, parameters):
+  prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN ANALYZE '
+  connection = db.engine.raw_connection()
+  try:
+    cursor = connection.cursor()
+    cursor.execute(prefix + statement, parameters)
+    return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+  finally:
+    connection.close()
+
+
+def measure(label):
+  results = {}
+  for name, call in hot_paths().items():
+    plans = [explain(statement, parameters) for statement, parameters in statements_of(call)]
+    timings = []
+    for _ in range(args.repeat):
+      start = time.perf_counter()
+      call()
+      timings.append((time.perf_counter() - start) * 1000)
+      db.session.rollback()
+    results[name] = {
+      "plan": plans,
+      "p50_ms": round(statistics.median(timings), 3),
+      "max_ms": round(max(timings), 3),
+    }
+    print('%-8s %-14s p50 %10.3f ms  max %10.3f ms' % (label, name, results[name]["p50_ms"], results[name]["max_ms"]))
+  return results
+
+
+def main():
+  with create_app().app_context():
+    db.create_all()
+    populate()
+    indexes = list(Show.__table__.indexes)
+    existing = set(index['name'] for index in inspect(db.engine).get_indexes(Show.__tablename__))
+    for index in indexes:
+      if index.name in existing:
+        index.drop(db.engine)
+    before = measure('before')
+    for index in indexes:
+      index.create(db.engine)
+    after = measure('after')
+    report = {
+      "database": db.engine.dialect.name,
+      "shows": args.shows,
+      "before": before,
+      "after": after,
+    }
+  with open(args.output, 'w') as output:
+    json.dump(report, output, indent=2, default=str)
+  print('written to %s' % args.output)
+
+
+if __name__ == '__main__':
+  main()
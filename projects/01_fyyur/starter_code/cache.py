@@ -0,0 +1,215 @@
+#----------------------------------------------------------------------------#
+# Rendered page cache.
+#
+# Pages are cached per route and entity id (e.g. ('show_venue', 3)) and
+# invalidated by bumping a generation counter, either for one entity or for
+# the whole route: entries of an older generation are never read again and
+# simply age out. That works the same on every backend and needs no key scans.
+#
+# Backends:
+#  - LRUBackend: in-process, bounded, with a TTL per entry.
+#  - RedisBackend: any Redis-compatible server, shared by all workers
+#    (needs the optional `redis` package).
+#
+# Parts of a page are cached with {% cache 'name', vary... %}...{% endcache %}
+# per template, endpoint and display settings, in an in-process LRUBackend of
+# their own: they do not depend on the database, so no write has to reach
+# them in other workers, and they stay cached with PAGE_CACHE=none.
+#----------------------------------------------------------------------------#
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, has_request_context, request, session
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+#WSGI environ key of requests that render through the view and leave the page cache alone (warm-up)
+BYPASS = 'fyyur.page_cache.bypass'
+
+
+class LRUBackend(object):
+
+  def __init__(self, max_entries=1024):
+    self.max_entries = max_entries
+    self._entries = OrderedDict()
+    #generation counters live apart from the pages: evicting one would resurrect stale pages
+    self._counters = {}
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      if key in self._counters:
+        return self._counters[key]
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      value, expires = entry
+      if expires is not None and expires < time.time():
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return value
+
+  def set(self, key, value, ttl=None):
+    with self._lock:
+      self._entries[key] = (value, time.time() + ttl if ttl else None)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def incr(self, key):
+    with self._lock:
+      self._counters[key] = self._counters.get(key, 0) + 1
+      return self._counters[key]
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._counters.clear()
+
+
+class RedisBackend(object):
+
+  def __init__(self, url, prefix='fyyur:'):
+    import redis
+    self.client = redis.Redis.from_url(url)
+    self.prefix = prefix
+
+  def get(self, key):
+    return self.client.get(self.prefix + key)
+
+  def set(self, key, value, ttl=None):
+    self.client.set(self.prefix + key, value, ex=ttl or None)
+
+  def incr(self, key):
+    return self.client.incr(self.prefix + key)
+
+  def clear(self):
+    for key in self.client.scan_iter(self.prefix + '*'):
+      self.client.delete(key)
+
+
+class PageCacheState(object):
+  # what the page cache keeps per app
+
+  def __init__(self, backend, ttl, fragments=None):
+    self.backend = backend
+    self.ttl = ttl
+    self.fragments = fragments
+
+
+class PageCache(object):
+
+  def __init__(self, app=None, vary=None):
+    # vary() returns what else, besides the url, the rendered html depends on
+    self.vary = vary
+    if app is not None:
+      self.init_app(app)
+
+  def init_app(self, app):
+    # PAGE_CACHE: 'lru' (default), 'redis' or 'none'
+    kind = app.config.get('PAGE_CACHE', 'lru')
+    if kind == 'redis':
+      backend = RedisBackend(app.config['PAGE_CACHE_REDIS_URL'])
+    elif kind == 'lru':
+      backend = LRUBackend(app.config.get('PAGE_CACHE_MAX_ENTRIES', 1024))
+    else:
+      backend = None
+    #FRAGMENT_CACHE: {% cache %} blocks, kept in the process whatever PAGE_CACHE is
+    fragments = LRUBackend(app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 256)) if app.config.get('FRAGMENT_CACHE', True) else None
+    app.extensions['page_cache'] = PageCacheState(backend, app.config.get('PAGE_CACHE_TTL', 60), fragments)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = self
+
+  @property
+  def backend(self):
+    # the backend of the current app
+    return current_app.extensions['page_cache'].backend
+
+  def _generation(self, backend, route, entity_id):
+    generation = '%d' % int(backend.get('gen:%s' % route) or 0)
+    if entity_id is not None:
+      generation += '.%d' % int(backend.get('gen:%s:%s' % (route, entity_id)) or 0)
+    return generation
+
+  def invalidate(self, route, entity_id=None):
+    # Drops the cached page of one entity of a route, or every page of the route;
+    # invalidate('fragments') drops the fragments cached by this process.
+    state = current_app.extensions['page_cache']
+    backend = state.fragments if route == 'fragments' else state.backend
+    if backend is None:
+      return
+    if entity_id is None:
+      backend.incr('gen:%s' % route)
+    else:
+      backend.incr('gen:%s:%s' % (route, entity_id))
+
+  def cached(self, route, entity_arg=None):
+    # Caches the html a view returns under (route, entity id, generation, path with query).
+    # Requests with pending flash messages render fresh, since the layout shows (and consumes) them.
+    def decorator(view):
+      @wraps(view)
+      def wrapper(*args, **kwargs):
+        state = current_app.extensions['page_cache']
+        if state.backend is None or request.method != 'GET' or session.get('_flashes') or request.environ.get(BYPASS):
+          return view(*args, **kwargs)
+        entity_id = kwargs.get(entity_arg) if entity_arg else None
+        key = 'page:%s:%s:%s:%s' % (route, entity_id, self._generation(state.backend, route, entity_id),
+          request.full_path)
+        if self.vary is not None:
+          key += ':%s' % (self.vary(),)
+        page = state.backend.get(key)
+        if page is not None:
+          return page
+        response = view(*args, **kwargs)
+        #only plain rendered html is cached; streamed responses, redirects and errors are not
+        if isinstance(response, str):
+          state.backend.set(key, response, state.ttl)
+        return response
+      return wrapper
+    return decorator
+
+  def fragment(self, template, args, render):
+    # The html of a {% cache %} block: cached per template, fragment name, vary arguments,
+    # endpoint and display settings; dropped with invalidate('fragments').
+    state = current_app.extensions['page_cache']
+    if state.fragments is None:
+      return render()
+    vary = '%s:%s:%s' % (args[1:], request.endpoint if has_request_context() else None, self.vary() if self.vary else None)
+    key = 'fragment:%s:%s:%s:%s' % (template, args[0], self._generation(state.fragments, 'fragments', None),
+      hashlib.md5(vary.encode('utf-8')).hexdigest())
+    html = state.fragments.get(key)
+    if html is None:
+      html = render()
+      state.fragments.set(key, html, state.ttl)
+    return Markup(html)
+
+
+class FragmentCacheExtension(Extension):
+  # {% cache 'name', vary... %}body{% endcache %}: the first argument names the fragment, the
+  # others are what its html depends on besides the endpoint and display settings.
+  tags = {'cache'}
+
+  def __init__(self, environment):
+    super(FragmentCacheExtension, self).__init__(environment)
+    environment.extend(fragment_cache=None)
+
+  def parse(self, parser):
+    lineno = next(parser.stream).lineno
+    args = [parser.parse_expression()]
+    while parser.stream.skip_if('comma'):
+      args.append(parser.parse_expression())
+    body = parser.parse_statements(['name:endcache'], drop_needle=True)
+    call = self.call_method('_cache', [nodes.Const(parser.name), nodes.List(args)])
+    return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+  def _cache(self, template, args, caller):
+    cache = self.environment.fragment_cache
+    if cache is None:
+      return caller()
+    return cache.fragment(template, args, caller)
@@ -10,4 +10,118 @@ DEBUG = True
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://ameerahalshihry@localhost:5432/fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://ameerahalshihry@localhost:5432/fyyur')
+
+# Connection pool (per worker process). With DB_PGBOUNCER the app does not pool at all and
+# leaves it to PgBouncer (transaction pooling); the statement timeout is then set per transaction.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', '0') == '1'
+# Checkouts waiting longer than this are logged
+DB_POOL_SLOW_CHECKOUT_MS = int(os.environ.get('DB_POOL_SLOW_CHECKOUT_MS', 100))
+
+# Expose /debug/* endpoints (pool metrics)
+DEBUG_ENDPOINTS = DEBUG
+
+# Per-request SQL profiling: X-Query-Count/X-Query-Time headers and /debug/queries.
+# Requests over their query budget (one number, or per endpoint) are logged, and fail when testing;
+# a statement shape run QUERY_REPEAT_THRESHOLD times in one request is logged as a likely N+1.
+QUERY_PROFILER = os.environ.get('QUERY_PROFILER', '1' if DEBUG else '0') == '1'
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_BUDGET = {
+  'index': 0,
+  'venues.venues': 1,
+  'venues.venues_by_genre': 1,
+  'venues.search_venues': 2,
+  'venues.show_venue': 1,
+  'artists.artists': 1,
+  'artists.artists_by_genre': 1,
+  'artists.search_artists': 2,
+  'artists.show_artist': 1,
+  'shows.shows': 1,
+}
+
+# Logging (outside debug mode): JSON lines written by a background thread to size-rotated files.
+# A LOG_SAMPLE_RATE fraction of requests is written to the access log; errors and requests
+# slower than LOG_SLOW_REQUEST_MS always are.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FILE = os.environ.get('LOG_FILE', 'error.log')
+ACCESS_LOG_FILE = os.environ.get('ACCESS_LOG_FILE', 'access.log')
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+LOG_SLOW_REQUEST_MS = 500
+
+# Show scheduling, in minutes: the duration of shows listed without one, and the longest a show
+# may last (overlap checks only look that far back); /venues/<id>/availability spans at most
+# AVAILABILITY_MAX_DAYS days
+SHOW_DEFAULT_DURATION = 120
+SHOW_MAX_DURATION = 24 * 60
+AVAILABILITY_MAX_DAYS = 92
+
+# /api/v1 collections: items per page by default and at most (?limit=)
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Most venues/artists one DELETE /venues or /artists request may remove
+DELETE_MAX_IDS = 1000
+
+# Serving with `python app.py`: 'wsgi' on the Werkzeug server, 'asgi' on uvicorn through asgi.py.
+# Under ASGI a worker runs requests on ASGI_THREADS threads;
+# 0 means one per database connection it may hold (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 0))
+
+# Built static assets (`flask build-assets`): where they are written and the URL they are served
+# under, cached by browsers for ASSETS_MAX_AGE seconds
+ASSETS_DIR = os.path.join(basedir, 'static', 'dist')
+ASSETS_URL_PATH = '/assets'
+ASSETS_MAX_AGE = 365 * 24 * 3600
+
+# Templates: compiled code is kept in a bytecode cache in TEMPLATE_CACHE_DIR (shared by the
+# workers and kept across restarts; unset: a per-user directory in the system temp dir), and with
+# TEMPLATE_PRECOMPILE every template is loaded when the app starts, not on its first request
+TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') == '1'
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '1') == '1'
+
+# Preloaded prefork serving (gunicorn -c gunicorn.conf.py wsgi:app): pages requested once in the master
+# before it forks, and by every worker before it accepts traffic
+WARMUP_PATHS = ['/', '/venues', '/venues/1', '/artists', '/artists/1', '/shows', '/venues/1/availability',
+  '/venues/create', '/artists/create', '/shows/create', '/api/v1/venues?limit=1', '/api/v1/shows?limit=1']
+
+# Number of (city, state) areas listed per page on /venues
+AREAS_PER_PAGE = 20
+
+
+# Number of hits listed per page on /venues/search and /artists/search
+SEARCH_RESULTS_PER_PAGE = 20
+
+# /shows listing: shows per page, whether pages are streamed to the client while they
+# are read from the database (also per request with ?stream=1), and the fetch batch size
+SHOWS_PER_PAGE = 30
+SHOWS_STREAM = False
+SHOWS_STREAM_BATCH = 100
+
+# Rendered page cache: 'lru' (in-process), 'redis' (shared, needs the redis package) or 'none'
+PAGE_CACHE = os.environ.get('PAGE_CACHE', 'lru')
+PAGE_CACHE_TTL = 60
+PAGE_CACHE_MAX_ENTRIES = 1024
+PAGE_CACHE_REDIS_URL = os.environ.get('PAGE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# {% cache %} fragments: kept in each process, apart from the page cache, for PAGE_CACHE_TTL
+FRAGMENT_CACHE = True
+FRAGMENT_CACHE_MAX_ENTRIES = 256
+
+# Rows written per transaction by `flask import` and POST /import/<kind>
+IMPORT_CHUNK_SIZE = 1000
+
+# Dates are shown in the best match of the Accept-Language header among LOCALES and in the
+# timezone of the `tz` cookie; stored show times are wall-clock times in DEFAULT_TIMEZONE
+LOCALES = ['en_US']
+DEFAULT_LOCALE = 'en_US'
+DEFAULT_TIMEZONE = 'UTC'
\ No newline at end of file
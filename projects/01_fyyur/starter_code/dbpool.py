@@ -0,0 +1,169 @@
+#----------------------------------------------------------------------------#
+# Database connection pool: engine options from config and pool metrics.
+#
+# Two modes:
+#  - pooled (default): an instrumented QueuePool per worker, sized by
+#    DB_POOL_SIZE / DB_MAX_OVERFLOW, with pre-ping and recycle.
+#  - PgBouncer (DB_PGBOUNCER): no pooling in the app (NullPool), PgBouncer
+#    pools for every worker; the statement timeout is set per transaction
+#    since PgBouncer rejects startup options and shares server sessions.
+# Every engine counts into a PoolMetrics of its own, returned by instrument()
+# and kept in app.extensions['pool_metrics'].
+#----------------------------------------------------------------------------#
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics(object):
+
+  def __init__(self, slow_checkout_ms=100):
+    self.slow_checkout_ms = slow_checkout_ms
+    self._lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self.connects = 0
+      self.checkouts = 0
+      self.checkins = 0
+      self.invalidations = 0
+      self.timeouts = 0
+      self.slow_checkouts = 0
+      self.wait_ms_total = 0.0
+      self.wait_ms_max = 0.0
+      self.overflow_max = 0
+
+  def checkout_waited(self, wait_ms, overflow):
+    with self._lock:
+      self.checkouts += 1
+      self.wait_ms_total += wait_ms
+      self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+      self.overflow_max = max(self.overflow_max, overflow)
+      slow = wait_ms >= self.slow_checkout_ms
+      if slow:
+        self.slow_checkouts += 1
+    if slow:
+      logger.warning('waited %.1f ms for a database connection (overflow %d)', wait_ms, overflow)
+
+  def count(self, name):
+    with self._lock:
+      setattr(self, name, getattr(self, name) + 1)
+
+  def as_dict(self):
+    with self._lock:
+      return {
+        "connects": self.connects,
+        "checkouts": self.checkouts,
+        "checkins": self.checkins,
+        "invalidations": self.invalidations,
+        "timeouts": self.timeouts,
+        "slow_checkouts": self.slow_checkouts,
+        "wait_ms_total": round(self.wait_ms_total, 3),
+        "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+        "wait_ms_max": round(self.wait_ms_max, 3),
+        "overflow_max": self.overflow_max,
+      }
+
+
+class InstrumentedQueuePool(QueuePool):
+  # A QueuePool that times every checkout: the wait for a free connection (or for a new
+  # one to be opened) is what tells whether workers are sized beyond the database.
+
+  #set by instrument()
+  metrics = None
+
+  def _do_get(self):
+    start = time.perf_counter()
+    try:
+      return super(InstrumentedQueuePool, self)._do_get()
+    except PoolTimeoutError:
+      self.metrics.count('timeouts')
+      raise
+    finally:
+      self.metrics.checkout_waited((time.perf_counter() - start) * 1000, max(self.overflow(), 0))
+
+  def recreate(self):
+    #engine.dispose() replaces the pool, the engine's metrics go on
+    pool = super(InstrumentedQueuePool, self).recreate()
+    pool.metrics = self.metrics
+    return pool
+
+
+def engine_options(config):
+  # SQLALCHEMY_ENGINE_OPTIONS for the configured database and mode
+  url = config['SQLALCHEMY_DATABASE_URI']
+  if url.startswith('sqlite'):
+    #SQLite connections are files or memory, SQLAlchemy's own pool choice is the right one
+    return {}
+  if config['DB_PGBOUNCER']:
+    return {"poolclass": NullPool}
+  options = {
+    "poolclass": InstrumentedQueuePool,
+    "pool_size": config['DB_POOL_SIZE'],
+    "max_overflow": config['DB_MAX_OVERFLOW'],
+    "pool_timeout": config['DB_POOL_TIMEOUT'],
+    "pool_recycle": config['DB_POOL_RECYCLE'],
+    "pool_pre_ping": config['DB_POOL_PRE_PING'],
+  }
+  if config['DB_STATEMENT_TIMEOUT_MS'] and url.startswith('postgres'):
+    options["connect_args"] = {"options": "-c statement_timeout=%d" % config['DB_STATEMENT_TIMEOUT_MS']}
+  return options
+
+
+def instrument(engine, config):
+  # Connection level listeners for the metrics, SQLite foreign keys and, behind PgBouncer,
+  # the statement timeout. Returns the engine's metrics.
+  metrics = PoolMetrics(config['DB_POOL_SLOW_CHECKOUT_MS'])
+  if isinstance(engine.pool, InstrumentedQueuePool):
+    engine.pool.metrics = metrics
+
+  @event.listens_for(engine, 'connect')
+  def on_connect(dbapi_connection, connection_record):
+    metrics.count('connects')
+    if engine.dialect.name == 'sqlite':
+      #SQLite ignores foreign keys, and so ON DELETE CASCADE, unless asked per connection
+      cursor = dbapi_connection.cursor()
+      cursor.execute('PRAGMA foreign_keys = ON')
+      cursor.close()
+
+  @event.listens_for(engine, 'checkin')
+  def on_checkin(dbapi_connection, connection_record):
+    metrics.count('checkins')
+
+  @event.listens_for(engine, 'invalidate')
+  def on_invalidate(dbapi_connection, connection_record, exception):
+    metrics.count('invalidations')
+
+  if config['DB_PGBOUNCER']:
+    #NullPool has no queue to wait on, count checkouts here instead
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+      metrics.checkout_waited(0.0, 0)
+
+    if config['DB_STATEMENT_TIMEOUT_MS'] and engine.dialect.name == 'postgresql':
+      @event.listens_for(engine, 'begin')
+      def on_begin(connection):
+        connection.execute(text('SET LOCAL statement_timeout = %d' % config['DB_STATEMENT_TIMEOUT_MS']))
+  return metrics
+
+
+def status(engine, metrics):
+  pool = engine.pool
+  state = {"pool": type(pool).__name__, "status": pool.status()}
+  if isinstance(pool, QueuePool):
+    state.update({
+      "size": pool.size(),
+      "checked_in": pool.checkedin(),
+      "checked_out": pool.checkedout(),
+      "overflow": max(pool.overflow(), 0),
+    })
+  state["metrics"] = metrics.as_dict()
+  return state
@@ -0,0 +1,22 @@
+#----------------------------------------------------------------------------#
+# Extensions.
+#
+# Created without an app and registered on one by create_app() (app.py), so
+# that the blueprints can use them (page_cache.cached) at import time. The
+# database is models.db; Flask-Migrate is only registered for `flask db`.
+# What they hold per app (cache backend, profiles, asset manifest) is kept in
+# app.extensions, so several apps, e.g. in tests, each keep their own.
+#----------------------------------------------------------------------------#
+
+from flask_moment import Moment
+
+import formatting
+from assets import Assets
+from cache import PageCache
+from profiler import QueryProfiler
+
+moment = Moment()
+#pages are rendered in the locale and timezone of the request
+page_cache = PageCache(vary=formatting.request_settings)
+assets = Assets()
+profiler = QueryProfiler()
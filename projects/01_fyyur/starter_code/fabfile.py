@@ -27,6 +27,18 @@ def prepare():
     commit()
     push()
 
+# benchmarks
+
+
+def benchmark(database_url="sqlite:////tmp/fyyur_load.db", baseline=""):
+    local("python benchmarks/generate.py --database-url {}".format(database_url))
+    compare = " --compare {}".format(baseline) if baseline else ""
+    local(
+        "python benchmarks/routes.py --database-url {} --output routes.json{}".format(
+            database_url, compare
+        )
+    )
+
 # deploy to heroku
 
 
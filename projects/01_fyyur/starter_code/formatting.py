@@ -0,0 +1,83 @@
+#----------------------------------------------------------------------------#
+# Datetime formatting for templates (the `datetime` filter).
+#
+# Values are formatted straight from datetime objects; strings are parsed
+# only when a template passes one. Babel patterns, locales and timezones are
+# resolved once and cached, and the locale (Accept-Language) and timezone
+# (`tz` cookie) of a request are resolved once per request.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from functools import lru_cache
+
+import babel.dates
+import dateutil.parser
+from babel import Locale
+from flask import current_app, g, has_request_context, request
+
+FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=128)
+def compiled_pattern(format):
+  return babel.dates.parse_pattern(FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=64)
+def locale(name):
+  return Locale.parse(name)
+
+
+@lru_cache(maxsize=256)
+def timezone(name):
+  return babel.dates.get_timezone(name)
+
+
+def known_timezone(name):
+  try:
+    timezone(name)
+    return True
+  except LookupError:
+    return False
+
+
+def to_timezone(value, source, target):
+  # Naive values are wall-clock times in `source`; they are shown in `target`.
+  if source == target:
+    return value
+  if value.tzinfo is None:
+    zone = timezone(source)
+    value = zone.localize(value) if hasattr(zone, 'localize') else value.replace(tzinfo=zone)
+  return value.astimezone(timezone(target))
+
+
+def request_settings():
+  # (locale, timezone) names to display the current request with
+  config = current_app.config
+  if not has_request_context():
+    return config['DEFAULT_LOCALE'], config['DEFAULT_TIMEZONE']
+  settings = g.get('_display_settings')
+  if settings is None:
+    locale_name = request.accept_languages.best_match(config['LOCALES'], default=config['DEFAULT_LOCALE'])
+    timezone_name = request.cookies.get('tz')
+    if not timezone_name or not known_timezone(timezone_name):
+      timezone_name = config['DEFAULT_TIMEZONE']
+    settings = g._display_settings = (locale_name, timezone_name)
+  return settings
+
+
+def format_datetime(value, format='medium', locale_name='en_US', source_timezone='UTC', target_timezone='UTC'):
+  if value is None:
+    return ''
+  if not isinstance(value, datetime):
+    value = dateutil.parser.parse(value)
+  value = to_timezone(value, source_timezone, target_timezone)
+  return compiled_pattern(format).apply(value, locale(locale_name))
+
+
+def datetime_filter(value, format='medium'):
+  locale_name, timezone_name = request_settings()
+  return format_datetime(value, format, locale_name, current_app.config['DEFAULT_TIMEZONE'], timezone_name)
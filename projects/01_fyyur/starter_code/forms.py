@@ -1,7 +1,11 @@
 from datetime import datetime
+from flask import current_app
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, IntegerField, HiddenField
+from wtforms.validators import DataRequired, AnyOf, URL, Optional, NumberRange
+
+def default_show_duration():
+    return current_app.config['SHOW_DEFAULT_DURATION']
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -15,6 +19,11 @@ class ShowForm(Form):
         validators=[DataRequired()],
         default= datetime.today()
     )
+    duration = IntegerField(
+        'duration',
+        validators=[Optional(), NumberRange(min=1)],
+        default=default_show_duration
+    )
 
 class VenueForm(Form):
     name = StringField(
@@ -116,6 +125,14 @@ class VenueForm(Form):
     facebook_link = StringField(
         'facebook_link', validators=[URL()]
     )
+    # row version the edit page was filled from
+    version = HiddenField(
+        'version'
+    )
+    # set by edit pages showing the genres select, which submits nothing once cleared
+    genres_shown = HiddenField(
+        'genres_shown'
+    )
 
 class ArtistForm(Form):
     name = StringField(
@@ -216,5 +233,13 @@ class ArtistForm(Form):
         # TODO implement enum restriction
         'facebook_link', validators=[URL()]
     )
+    # row version the edit page was filled from
+    version = HiddenField(
+        'version'
+    )
+    # set by edit pages showing the genres select, which submits nothing once cleared
+    genres_shown = HiddenField(
+        'genres_shown'
+    )
 
 # TODO IMPLEMENT NEW ARTIST FORM AND NEW SHOW FORM
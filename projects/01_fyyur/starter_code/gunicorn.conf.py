@@ -0,0 +1,45 @@
+#----------------------------------------------------------------------------#
+# Gunicorn settings: preloaded prefork serving (see prefork.py).
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# With PRELOAD=0 every worker imports and creates the app itself and serves
+# without a warm-up, as gunicorn does by default.
+#----------------------------------------------------------------------------#
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('PRELOAD', '1') == '1'
+
+#an 'lru' page cache is per process, and a write only invalidates it in the worker that handled
+#it: the others would serve stale pages. Workers share the redis one, or cache no pages
+#(fragments are cached in each worker either way).
+os.environ.setdefault('PAGE_CACHE', 'redis' if os.environ.get('PAGE_CACHE_REDIS_URL') else 'none')
+
+
+def when_ready(server):
+  # in the master, with the app loaded, before the first worker is forked
+  if os.environ['PAGE_CACHE'] == 'lru' and server.cfg.workers > 1:
+    server.log.warning('PAGE_CACHE=lru with %d workers: each caches its own pages, and pages changed by a '
+      'write stay stale in the other workers for up to PAGE_CACHE_TTL; use PAGE_CACHE=redis', server.cfg.workers)
+  if server.cfg.preload_app:
+    import prefork
+    timings = prefork.preload(server.app.wsgi())
+    server.log.info('app preloaded, warm-up took %.1f ms', sum(ms for _, _, ms in timings))
+
+
+def post_fork(server, worker):
+  if server.cfg.preload_app:
+    import prefork
+    prefork.after_fork(worker.app.wsgi())
+
+
+def post_worker_init(worker):
+  # the worker accepts connections once this returns
+  if worker.cfg.preload_app:
+    import prefork
+    timings = prefork.warm_up(worker.wsgi, connections=worker.cfg.threads)
+    worker.log.info('worker %s warmed up in %.1f ms', worker.pid, sum(ms for _, _, ms in timings))
@@ -0,0 +1,120 @@
+#----------------------------------------------------------------------------#
+# Bulk import of venues, artists and shows.
+#
+# Records are read one at a time from a CSV, JSON lines or JSON array stream,
+# validated with the same form classes as the create pages, and handed to a
+# writer in chunks; each chunk is written in its own transaction. Rows that
+# fail validation, or belong to a chunk that fails to write, are reported with
+# their line (CSV / JSON lines) or position (JSON array) and the reason.
+#----------------------------------------------------------------------------#
+
+import codecs
+import csv
+import json
+
+from werkzeug.datastructures import MultiDict
+
+FORMATS = ('csv', 'jsonl', 'json')
+
+
+def detect_format(filename=None, content_type=None):
+  filename = (filename or '').lower()
+  content_type = (content_type or '').lower()
+  if filename.endswith('.csv') or 'csv' in content_type:
+    return 'csv'
+  if filename.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+    return 'jsonl'
+  if filename.endswith('.json') or 'json' in content_type:
+    return 'json'
+  return None
+
+
+def read_records(stream, format):
+  # Yields (line, record) from a binary stream without reading it all in first, except
+  # for a JSON array, which has to be parsed whole.
+  text = codecs.getreader('utf-8-sig')(stream)
+  if format == 'csv':
+    reader = csv.DictReader(text)
+    for record in reader:
+      yield reader.line_num, record
+  elif format == 'jsonl':
+    for line, raw in enumerate(text, 1):
+      if raw.strip():
+        try:
+          yield line, json.loads(raw)
+        except ValueError as error:
+          #reported for this line, the rest of the stream is still imported
+          yield line, error
+  elif format == 'json':
+    for position, record in enumerate(json.load(text), 1):
+      yield position, record
+  else:
+    raise ValueError('unknown import format %r, expected one of %s' % (format, ', '.join(FORMATS)))
+
+
+def to_formdata(record, list_fields=()):
+  # Form data for a record; list fields (genres) may come as a list or a comma separated string.
+  formdata = MultiDict()
+  for key, value in record.items():
+    if value is None or key is None:
+      continue
+    if key in list_fields:
+      values = value if isinstance(value, list) else str(value).split(',')
+      for item in values:
+        if str(item).strip():
+          formdata.add(key, str(item).strip())
+    else:
+      formdata.add(key, str(value))
+  return formdata
+
+
+def validate(form_class, record, required=(), list_fields=()):
+  # Returns (form, errors) with the record validated by the form class of the create page.
+  formdata = to_formdata(record, list_fields)
+  form = form_class(formdata=formdata, meta={'csrf': False})
+  form.validate()
+  errors = dict(form.errors)
+  for field in required:
+    if not formdata.get(field):
+      errors[field] = ['This field is required.']
+  return form, errors
+
+
+def run_import(records, check, write_chunk, chunk_size=1000):
+  # check(record) returns (row, errors); write_chunk(rows) writes and commits one chunk of
+  # valid rows, returning a {line: error} dict for rows it rejected, and must leave the
+  # session usable (rolled back) when it raises.
+  report = {"read": 0, "inserted": 0, "failed": 0, "errors": []}
+  chunk = []
+
+  def flush():
+    lines = [line for line, _ in chunk]
+    try:
+      rejected = write_chunk(chunk) or {}
+    except Exception as error:
+      rejected = dict((line, 'chunk not written: %s' % error) for line in lines)
+    for line in lines:
+      if line in rejected:
+        report["failed"] += 1
+        report["errors"].append({"line": line, "errors": rejected[line]})
+      else:
+        report["inserted"] += 1
+    del chunk[:]
+
+  for line, record in records:
+    report["read"] += 1
+    if isinstance(record, Exception) or not isinstance(record, dict):
+      report["failed"] += 1
+      report["errors"].append({"line": line, "errors": 'not a record: %s' % record})
+      continue
+    row, errors = check(record)
+    if errors:
+      report["failed"] += 1
+      report["errors"].append({"line": line, "errors": errors})
+      continue
+    chunk.append((line, row))
+    if len(chunk) >= chunk_size:
+      flush()
+  if chunk:
+    flush()
+  return report
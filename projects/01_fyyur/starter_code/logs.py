@@ -0,0 +1,170 @@
+#----------------------------------------------------------------------------#
+# Application and access logging.
+#
+# Request threads only put records on a queue; a QueueListener thread formats
+# them as JSON lines and writes them to size-rotated files. Access records
+# (one per request: route, status, latency, query count) can be sampled; errors
+# and slow requests are always kept. Sampled-out records are dropped before
+# they reach the queue. Each app logs through loggers of its own, so apps
+# created in the same process do not write to each other's files.
+#----------------------------------------------------------------------------#
+
+import copy
+import json
+import logging
+import queue
+import random
+import time
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+ACCESS_LOGGER = 'fyyur.access'
+
+#attributes every LogRecord has; anything else was passed with extra= and goes into the JSON
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+
+  def format(self, record):
+    entry = {
+      "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+      "level": record.levelname,
+      "logger": record.name,
+      "message": record.getMessage(),
+    }
+    for key, value in vars(record).items():
+      if key not in RECORD_ATTRIBUTES:
+        entry[key] = value
+    if record.exc_text:
+      entry["exception"] = record.exc_text
+    elif record.exc_info:
+      entry["exception"] = self.formatException(record.exc_info)
+    return json.dumps(entry, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+  # Enqueues records as they are; formatting happens on the listener thread. Only the
+  # message and traceback are resolved here, while the arguments and exception still exist.
+
+  def prepare(self, record):
+    record = copy.copy(record)
+    record.msg = record.getMessage()
+    record.args = None
+    if record.exc_info:
+      record.exc_text = logging.Formatter().formatException(record.exc_info)
+      record.exc_info = None
+    return record
+
+
+class SamplingFilter(logging.Filter):
+  # Keeps a `rate` fraction of the access records; errors and slow requests are always kept.
+
+  def __init__(self, rate=1.0, slow_ms=None):
+    super(SamplingFilter, self).__init__()
+    self.rate = rate
+    self.slow_ms = slow_ms
+
+  def filter(self, record):
+    if self.rate >= 1 or record.levelno >= logging.WARNING:
+      return True
+    if getattr(record, 'status', 0) >= 500:
+      return True
+    if self.slow_ms is not None and getattr(record, 'latency_ms', 0) >= self.slow_ms:
+      return True
+    return random.random() < self.rate
+
+
+def file_handler(filename, config):
+  handler = RotatingFileHandler(filename, maxBytes=config['LOG_MAX_BYTES'], backupCount=config['LOG_BACKUP_COUNT'], delay=True)
+  handler.setFormatter(JsonFormatter())
+  return handler
+
+
+def init_app(app, engine):
+  # Routes app.logger and the access log through one background listener.
+  config = app.config
+  records = queue.Queue(-1)
+  handlers = [file_handler(config['LOG_FILE'], config)]
+  app_handler = BackgroundHandler(records)
+  app_handler.setLevel(config['LOG_LEVEL'])
+  #logging.getLogger(app.name) is shared by every app of that name; the app gets a child
+  #logger of its own, which still propagates to Flask's stderr handler there
+  logger = logging.Logger(app.name, config['LOG_LEVEL'])
+  logger.parent = app.logger
+  logger.addHandler(app_handler)
+  app.logger = logger
+
+  if config['ACCESS_LOG_FILE']:
+    access_file = file_handler(config['ACCESS_LOG_FILE'], config)
+    access_file.addFilter(lambda record: record.name == ACCESS_LOGGER)
+    handlers[0].addFilter(lambda record: record.name != ACCESS_LOGGER)
+    handlers.append(access_file)
+    access_handler = BackgroundHandler(records)
+    access_handler.addFilter(SamplingFilter(config['LOG_SAMPLE_RATE'], config['LOG_SLOW_REQUEST_MS']))
+    #not logging.getLogger(ACCESS_LOGGER): that one would be shared too
+    access = logging.Logger(ACCESS_LOGGER, logging.INFO)
+    access.addHandler(access_handler)
+    log_requests(app, engine, access)
+
+  listener = QueueListener(records, *handlers, respect_handler_level=True)
+  listener.start()
+  app.extensions['log_listener'] = listener
+  #at exit, or once the app is gone; unlike atexit.register, this does not keep the app alive
+  weakref.finalize(app, stop_listener, listener)
+  return listener
+
+
+def stop_listener(listener):
+  if listener._thread is not None:
+    listener.stop()
+
+
+def stop(app):
+  # Writes out the queued records and stops the listener thread. Threads do not survive a fork:
+  # a prefork master stops it before forking and every worker starts it again (see prefork.py).
+  listener = app.extensions.get('log_listener')
+  if listener is not None:
+    stop_listener(listener)
+
+
+def start(app):
+  listener = app.extensions.get('log_listener')
+  if listener is not None and listener._thread is None:
+    listener.start()
+
+
+def log_requests(app, engine, access):
+  slow_ms = app.config['LOG_SLOW_REQUEST_MS']
+
+  @event.listens_for(engine, 'after_cursor_execute')
+  def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_log_start' in g:
+      g._log_queries += 1
+
+  @app.before_request
+  def start_request():
+    g._log_start = time.perf_counter()
+    g._log_queries = 0
+
+  @app.after_request
+  def log_request(response):
+    if '_log_start' not in g:
+      return response
+    latency_ms = (time.perf_counter() - g._log_start) * 1000
+    level = logging.WARNING if slow_ms is not None and latency_ms >= slow_ms else logging.INFO
+    access.log(level, '%s %s %s', request.method, request.path, response.status_code, extra={
+      "route": request.url_rule.rule if request.url_rule else None,
+      "endpoint": request.endpoint,
+      "method": request.method,
+      "path": request.path,
+      "status": response.status_code,
+      "latency_ms": round(latency_ms, 3),
+      "queries": g._log_queries,
+      "remote_addr": request.remote_addr,
+    })
+    return response
@@ -0,0 +1,35 @@
+"""show end time: end_time column on Show, backfilled with the default duration
+
+Revision ID: 5d8e1f3b2a47
+Revises: e7a3b5f08c21
+Create Date: 2026-10-18 17:31:07.415926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e1f3b2a47'
+down_revision = 'e7a3b5f08c21'
+branch_labels = None
+depends_on = None
+
+#SHOW_DEFAULT_DURATION when this migration was written, in minutes
+DEFAULT_DURATION = 120
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('UPDATE "Show" SET end_time = datetime(start_time, \'+%d minutes\')' % DEFAULT_DURATION)
+        with op.batch_alter_table('Show') as batch_op:
+            batch_op.alter_column('end_time', existing_type=sa.DateTime(), nullable=False)
+    else:
+        op.execute('UPDATE "Show" SET end_time = start_time + interval \'%d minutes\'' % DEFAULT_DURATION)
+        op.alter_column('Show', 'end_time', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Show') as batch_op:
+        batch_op.drop_column('end_time')
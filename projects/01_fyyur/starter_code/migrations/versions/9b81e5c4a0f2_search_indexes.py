@@ -0,0 +1,71 @@
+"""search indexes over venue and artist name, city, state and genres
+
+Revision ID: 9b81e5c4a0f2
+Revises: 3f2a9c1d7b64
+Create Date: 2026-10-18 10:41:07.530911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b81e5c4a0f2'
+down_revision = '3f2a9c1d7b64'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+COLUMNS = ('name', 'city', 'state', 'genres')
+
+# must stay identical to search.DOCUMENT for the planner to pick the indexes
+DOCUMENT = (
+    "coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || "
+    "coalesce(state, '') || ' ' || coalesce(genres, '')"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in TABLES:
+            op.execute('CREATE INDEX "ix_{0}_search_trgm" ON "{0}" USING gin (({1}) gin_trgm_ops)'.format(table, DOCUMENT))
+            op.execute('CREATE INDEX "ix_{0}_search_tsv" ON "{0}" USING gin (to_tsvector(\'simple\', {1}))'.format(table, DOCUMENT))
+    elif dialect == 'sqlite':
+        columns = ', '.join(COLUMNS)
+        new_values = ', '.join('new.' + column for column in COLUMNS)
+        old_values = ', '.join('old.' + column for column in COLUMNS)
+        for table in TABLES:
+            search = table + '_search'
+            op.execute(
+                'CREATE VIRTUAL TABLE "{0}" USING fts5({1}, content=\'{2}\', content_rowid=\'id\', tokenize=\'trigram\')'
+                .format(search, columns, table))
+            op.execute(
+                'CREATE TRIGGER "{0}_ai" AFTER INSERT ON "{1}" BEGIN '
+                'INSERT INTO "{0}"(rowid, {2}) VALUES (new.id, {3}); END'
+                .format(search, table, columns, new_values))
+            op.execute(
+                'CREATE TRIGGER "{0}_ad" AFTER DELETE ON "{1}" BEGIN '
+                'INSERT INTO "{0}"("{0}", rowid, {2}) VALUES (\'delete\', old.id, {3}); END'
+                .format(search, table, columns, old_values))
+            op.execute(
+                'CREATE TRIGGER "{0}_au" AFTER UPDATE ON "{1}" BEGIN '
+                'INSERT INTO "{0}"("{0}", rowid, {2}) VALUES (\'delete\', old.id, {3}); '
+                'INSERT INTO "{0}"(rowid, {2}) VALUES (new.id, {4}); END'
+                .format(search, table, columns, old_values, new_values))
+            op.execute('INSERT INTO "{0}"("{0}") VALUES (\'rebuild\')'.format(search))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in TABLES:
+            op.execute('DROP INDEX "ix_{0}_search_tsv"'.format(table))
+            op.execute('DROP INDEX "ix_{0}_search_trgm"'.format(table))
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            search = table + '_search'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER "{0}_{1}"'.format(search, suffix))
+            op.execute('DROP TABLE "{0}"'.format(search))
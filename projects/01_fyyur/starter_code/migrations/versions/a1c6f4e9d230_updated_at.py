@@ -0,0 +1,34 @@
+"""updated_at row versions on Venue, Artist and Show
+
+Revision ID: a1c6f4e9d230
+Revises: 5d8e1f3b2a47
+Create Date: 2026-10-18 18:02:44.190553
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c6f4e9d230'
+down_revision = '5d8e1f3b2a47'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute('UPDATE "%s" SET updated_at = CURRENT_TIMESTAMP' % table)
+        #on SQLite NOT NULL would mean rebuilding the tables, and with them the search triggers
+        #on Venue and Artist; the app always writes updated_at
+        if not sqlite:
+            op.alter_column(table, 'updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
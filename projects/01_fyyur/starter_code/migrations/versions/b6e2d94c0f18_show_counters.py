@@ -0,0 +1,48 @@
+"""show counters: upcoming/past show counts on Venue and Artist, ShowRollover watermark
+
+Revision ID: b6e2d94c0f18
+Revises: a1c6f4e9d230
+Create Date: 2026-10-18 18:40:12.583370
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d94c0f18'
+down_revision = 'a1c6f4e9d230'
+branch_labels = None
+depends_on = None
+
+OWNERS = (('Venue', 'venue_id'), ('Artist', 'artist_id'))
+
+
+def upgrade():
+    rollover = op.create_table('ShowRollover',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rolled_over_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    rolled_over_at = datetime.now()
+    op.bulk_insert(rollover, [{'id': 1, 'rolled_over_at': rolled_over_at}])
+
+    for table, show_fk in OWNERS:
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.get_bind().execute(sa.text(
+            'UPDATE "{table}" SET '
+            'upcoming_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{fk} = "{table}".id AND "Show".start_time > :at), '
+            'past_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{fk} = "{table}".id AND "Show".start_time <= :at)'
+            .format(table=table, fk=show_fk)
+        ), at=rolled_over_at)
+
+
+def downgrade():
+    #plain ALTER TABLE DROP COLUMN (SQLite 3.35+): rebuilding the tables would drop the search triggers
+    for table, _ in reversed(OWNERS):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+    op.drop_table('ShowRollover')
@@ -0,0 +1,100 @@
+"""normalized genres: Genre table and venue/artist association tables
+
+Revision ID: c4d7e2a91f35
+Revises: 9b81e5c4a0f2
+Create Date: 2026-10-18 11:58:22.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e2a91f35'
+down_revision = '9b81e5c4a0f2'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def split_genres(value):
+    # genres used to be written as stringified lists, either Postgres arrays or Python lists
+    if not value:
+        return []
+    names = [name.strip().strip('\'"').strip() for name in value.strip().strip('{}[]').split(',')]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def upgrade():
+    op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('venue_genres',
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    sa.PrimaryKeyConstraint('venue_id', 'genre_id')
+    )
+    op.create_index('ix_venue_genres_genre_id_venue_id', 'venue_genres', ['genre_id', 'venue_id'], unique=False)
+    op.create_table('artist_genres',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+    sa.PrimaryKeyConstraint('artist_id', 'genre_id')
+    )
+    op.create_index('ix_artist_genres_genre_id_artist_id', 'artist_genres', ['genre_id', 'artist_id'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        # every genre joined by commas does not fit in 120 characters (SQLite ignores lengths)
+        op.alter_column('Venue', 'genres', type_=sa.String(length=500), existing_type=sa.String(length=120))
+        op.alter_column('Artist', 'genres', type_=sa.String(length=500), existing_type=sa.String(length=120))
+
+    genre = sa.Table('Genre', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String))
+    genre_ids = {}
+    for table, links, owner_key in (('Venue', 'venue_genres', 'venue_id'), ('Artist', 'artist_genres', 'artist_id')):
+        owner = sa.table(table, sa.column('id', sa.Integer), sa.column('genres', sa.String))
+        link = sa.table(links, sa.column(owner_key, sa.Integer), sa.column('genre_id', sa.Integer))
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select([owner.c.id, owner.c.genres])
+                .where(owner.c.id > last_id)
+                .order_by(owner.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            link_rows = []
+            for row in rows:
+                names = split_genres(row.genres)
+                for name in names:
+                    if name not in genre_ids:
+                        genre_ids[name] = bind.execute(genre.insert().values(name=name)).inserted_primary_key[0]
+                    link_rows.append({owner_key: row.id, 'genre_id': genre_ids[name]})
+                normalized = ','.join(names) or None
+                if normalized != row.genres:
+                    bind.execute(owner.update().where(owner.c.id == row.id).values(genres=normalized))
+            if link_rows:
+                bind.execute(link.insert(), link_rows)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        op.alter_column('Artist', 'genres', type_=sa.String(length=120), existing_type=sa.String(length=500))
+        op.alter_column('Venue', 'genres', type_=sa.String(length=120), existing_type=sa.String(length=500))
+    op.drop_index('ix_artist_genres_genre_id_artist_id', table_name='artist_genres')
+    op.drop_table('artist_genres')
+    op.drop_index('ix_venue_genres_genre_id_venue_id', table_name='venue_genres')
+    op.drop_table('venue_genres')
+    op.drop_table('Genre')
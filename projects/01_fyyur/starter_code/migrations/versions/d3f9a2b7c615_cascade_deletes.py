@@ -0,0 +1,47 @@
+"""cascade deletes: shows and genre links go with their venue or artist
+
+Revision ID: d3f9a2b7c615
+Revises: b6e2d94c0f18
+Create Date: 2026-10-18 19:12:38.027164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f9a2b7c615'
+down_revision = 'b6e2d94c0f18'
+branch_labels = None
+depends_on = None
+
+#(table, column, referred table)
+FOREIGN_KEYS = (
+    ('Show', 'venue_id', 'Venue'),
+    ('Show', 'artist_id', 'Artist'),
+    ('venue_genres', 'venue_id', 'Venue'),
+    ('artist_genres', 'artist_id', 'Artist'),
+)
+
+#names for the constraints SQLite reflects without one, so batch mode can drop them
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def replace_foreign_keys(ondelete):
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in dict.fromkeys(table for table, _, _ in FOREIGN_KEYS):
+        keys = [(column, referred) for name, column, referred in FOREIGN_KEYS if name == table]
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referred in keys:
+                #Postgres named them <table>_<column>_fkey when the tables were created
+                name = 'fk_%s_%s_%s' % (table, column, referred) if sqlite else '%s_%s_fkey' % (table, column)
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    replace_foreign_keys(None)
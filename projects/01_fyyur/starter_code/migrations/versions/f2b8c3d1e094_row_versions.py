@@ -0,0 +1,26 @@
+"""row versions: version column on Venue and Artist for optimistic concurrency of edits
+
+Revision ID: f2b8c3d1e094
+Revises: d3f9a2b7c615
+Create Date: 2026-10-18 19:48:26.731840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c3d1e094'
+down_revision = 'd3f9a2b7c615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('Artist', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('Artist', 'version')
+    op.drop_column('Venue', 'version')
@@ -0,0 +1,639 @@
+#----------------------------------------------------------------------------#
+# Models and the queries over them.
+#
+# `db` is created unbound and registered on an app by create_app() (app.py),
+# so the models can be imported by the blueprints, the CLI and scripts without
+# building an app. Settings are read from the current app.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, case, exists, func, literal, tuple_
+
+import search
+
+db = SQLAlchemy()
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+#Genre browsing looks venues/artists up by genre_id, hence the (genre_id, owner) indexes
+venue_genres = db.Table('venue_genres',
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+artist_genres = db.Table('artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    #comma separated genre names, kept for display and the search document; genre_tags is the indexed copy
+    genres = db.Column(db.String(500))
+    website = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String(500))
+    #shows starting after / up to the last rollover, see Show counters below
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    #bumped by every edit; edits are only written over the version they were made from
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+    #Put relationship in Parent table we can access the shows by Venue.shows or in Child table Show.venue
+    #shows and genre links are deleted by the database (ON DELETE CASCADE), not loaded to be deleted
+    shows = db.relationship('Show', backref='venue', lazy=True, passive_deletes=True)
+    genre_tags = db.relationship('Genre', secondary=venue_genres, lazy=True, passive_deletes=True)
+
+    #backs the keyset pagination of the /venues area listing
+    __table_args__ = (db.Index('ix_Venue_city_state', 'city', 'state'),)
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    #comma separated genre names, kept for display and the search document; genre_tags is the indexed copy
+    genres = db.Column(db.String(500))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_venue = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String(500))
+    #shows starting after / up to the last rollover, see Show counters below
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    #bumped by every edit; edits are only written over the version they were made from
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+    #Put relationship in Parent table we can access the shows by Artist.shows or in Child table Show.artist
+    #shows and genre links are deleted by the database (ON DELETE CASCADE), not loaded to be deleted
+    shows = db.relationship('Show', backref='artist', lazy=True, passive_deletes=True)
+    genre_tags = db.relationship('Genre', secondary=artist_genres, lazy=True, passive_deletes=True)
+
+#with db.create_all(), the search indexes come with the tables
+search.create_indexes(Venue)
+search.create_indexes(Artist)
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+def show_end_time(start_time, duration=None):
+  return start_time + timedelta(minutes=duration or current_app.config['SHOW_DEFAULT_DURATION'])
+
+def default_end_time(context):
+  #shows inserted without an end time (imports, scripts) last SHOW_DEFAULT_DURATION
+  return show_end_time(context.get_current_parameters()['start_time'])
+
+class Show(db.Model):
+  __tablename__ = 'Show'
+
+  id = db.Column(db.Integer, primary_key=True)
+  artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+  venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+  start_time = db.Column(db.DateTime, nullable=False)
+  end_time = db.Column(db.DateTime, nullable=False, default=default_end_time)
+  updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+  #detail pages, search counts and the listings all filter shows of one venue/artist by time,
+  #and /shows walks them in (start_time, id) order
+  __table_args__ = (
+    db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+    db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+  )
+
+class ShowRollover(db.Model):
+  #a single row: the time up to which shows are counted as past on Venue and Artist
+  __tablename__ = 'ShowRollover'
+
+  id = db.Column(db.Integer, primary_key=True)
+  rolled_over_at = db.Column(db.DateTime, nullable=False)
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+
+def split_genres(value):
+  # Genre names out of the genres column. Rows written before genres were normalized hold
+  # a stringified list instead, either a Postgres array ('{Jazz,"Rock n Roll"}') or a
+  # Python one ("['Jazz', 'Rock n Roll']"); genre names never contain commas.
+  if not value:
+    return []
+  names = value.strip().strip('{}[]').split(',')
+  return [name.strip().strip('\'"').strip() for name in names if name.strip().strip('\'"').strip()]
+
+def set_genres(entity, names):
+  # Writes both copies of the genres of a venue or artist, creating unknown genres.
+  names = list(dict.fromkeys(names))
+  existing = Genre.query.filter(Genre.name.in_(names)).all() if names else []
+  known = {genre.name: genre for genre in existing}
+  entity.genre_tags = [known.get(name) or Genre(name=name) for name in names]
+  entity.genres = ','.join(names)
+
+def link_genres(links, link_fk, entity_id, old_names, names):
+  # Replaces the genre links of one venue or artist, writing only the links that changed
+  # and creating unknown genres.
+  added = [name for name in names if name not in old_names]
+  removed = [name for name in old_names if name not in names]
+  genre_ids = dict(db.session.query(Genre.name, Genre.id).filter(Genre.name.in_(added + removed))) if added or removed else {}
+  for name in added:
+    if name not in genre_ids:
+      genre = Genre(name=name)
+      db.session.add(genre)
+      db.session.flush()
+      genre_ids[name] = genre.id
+  removed_ids = [genre_ids[name] for name in removed if name in genre_ids]
+  if removed_ids:
+    db.session.execute(links.delete().where(and_(link_fk == entity_id, links.c.genre_id.in_(removed_ids))))
+  if added:
+    db.session.execute(links.insert(), [{link_fk.name: entity_id, "genre_id": genre_ids[name]} for name in added])
+
+def by_genre(model, links, link_fk, genre, page=1, per_page=20):
+  # Venues or artists tagged with a genre, through the (genre_id, owner) index.
+  rows = db.session.query(model.id, model.name) \
+    .join(links, link_fk == model.id) \
+    .join(Genre, Genre.id == links.c.genre_id) \
+    .filter(Genre.name == genre) \
+    .order_by(model.name, model.id) \
+    .limit(per_page + 1) \
+    .offset((page - 1) * per_page) \
+    .all()
+  return {
+    "data": [{"id": row.id, "name": row.name} for row in rows[:per_page]],
+    "page": page,
+    "next_page": page + 1 if len(rows) > per_page else None
+  }
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+def entity_with_shows(model, entity_id, counterpart, own_fk, counterpart_fk):
+  # Loads a venue (or artist) together with all of its shows and the artist (or venue)
+  # playing each one in a single round trip. The past/upcoming split and both counts
+  # are computed by the database, so the page costs one query however many shows there are.
+  now = datetime.now()
+  is_upcoming = Show.start_time > now
+  rows = db.session.query(
+      model,
+      counterpart.id,
+      counterpart.name,
+      counterpart.image_link,
+      Show.start_time,
+      is_upcoming.label('is_upcoming'),
+      func.sum(case([(is_upcoming, 1)], else_=0)).over().label('upcoming_count'),
+      func.sum(case([(Show.start_time <= now, 1)], else_=0)).over().label('past_count')
+    ).outerjoin(Show, own_fk == model.id) \
+    .outerjoin(counterpart, counterpart.id == counterpart_fk) \
+    .filter(model.id == entity_id) \
+    .order_by(Show.start_time) \
+    .all()
+  if not rows:
+    return None
+
+  #the counterpart keys are prefixed the way the templates expect them, e.g. artist_name
+  prefix = counterpart.__tablename__.lower()
+  past_shows=[]
+  upcoming_shows=[]
+  for row in rows:
+    #an entity without shows still comes back as one row with NULL show columns
+    if row.start_time is None:
+      continue
+    show = {
+      prefix + "_id": row[1],
+      prefix + "_name": row[2],
+      prefix + "_image_link": row[3],
+      "start_time": row.start_time
+    }
+    if row.is_upcoming:
+      upcoming_shows.append(show)
+    else:
+      past_shows.append(show)
+
+  return {
+    "entity": rows[0][0],
+    "past_shows": past_shows,
+    "upcoming_shows": upcoming_shows,
+    "past_shows_count": rows[0].past_count or 0,
+    "upcoming_shows_count": rows[0].upcoming_count or 0
+  }
+
+def venue_areas(after=None, limit=10):
+  # Groups venues by (city, state) with the (counted) number of upcoming shows of every venue.
+  # Areas are paginated by keyset: `after` is the (city, state) of the last area of
+  # the previous page, so each page is an index range scan instead of an OFFSET.
+  # Returns the areas of the page and the cursor of the next page (None on the last one).
+  areas = db.session.query(Venue.city, Venue.state).distinct()
+  if after:
+    areas = areas.filter(tuple_(Venue.city, Venue.state) > tuple_(*after))
+  #one extra area tells us whether there is a next page
+  areas = areas.order_by(Venue.city, Venue.state).limit(limit + 1).subquery()
+
+  rows = db.session.query(
+      Venue.id,
+      Venue.name,
+      Venue.city,
+      Venue.state,
+      Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ).join(areas, and_(areas.c.city == Venue.city, areas.c.state == Venue.state)) \
+    .order_by(Venue.city, Venue.state, Venue.name, Venue.id) \
+    .all()
+
+  data=[]
+  for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+    data.append({
+      "city": city,
+      "state": state,
+      "venues": [{
+        "id": venue.id,
+        "name": venue.name,
+        "num_upcoming_shows": venue.num_upcoming_shows
+      } for venue in venues]
+    })
+
+  next_cursor = None
+  if len(data) > limit:
+    data = data[:limit]
+    next_cursor = (data[-1]["city"], data[-1]["state"])
+  return data, next_cursor
+
+def search_with_upcoming_counts(model, search_term, page=1, per_page=20):
+  # Case-insensitive substring/prefix search over name, city, state and genres through the
+  # search indexes (see search.py), best match first. The hits of the requested page come
+  # back with their counted upcoming shows; the total number of hits is a window count,
+  # so a broad term does not fan out into a query per hit.
+  hits = search.matches(db.engine.dialect.name, model, search_term)
+  query = db.session.query(
+      model.id,
+      model.name,
+      model.upcoming_shows_count.label('num_upcoming_shows'),
+      func.count().over().label('total')
+    )
+  if hits is not None:
+    query = query.join(hits, hits.c.id == model.id) \
+      .order_by(hits.c.rank.desc())
+  rows = query.order_by(model.name, model.id) \
+    .limit(per_page) \
+    .offset((page - 1) * per_page) \
+    .all()
+
+  if rows:
+    count = rows[0].total
+  elif page > 1:
+    #paged past the end, there are no rows to read the total from
+    count = db.session.query(func.count(model.id)).select_from(model)
+    if hits is not None:
+      count = count.join(hits, hits.c.id == model.id)
+    count = count.scalar()
+  else:
+    count = 0
+  return {
+    "count": count,
+    "data": [{
+      "id": row.id,
+      "name": row.name,
+      "num_upcoming_shows": row.num_upcoming_shows
+    } for row in rows],
+    "page": page,
+    "next_page": page + 1 if page * per_page < count else None
+  }
+
+def shows_page(after=None, limit=30):
+  # One page of shows with the venue and artist columns the listing needs, joined in the
+  # same query. Pages are keyset-paginated on (start_time, id): `after` is the pair of the
+  # last show of the previous page, so the cost of a page does not depend on its depth.
+  query = db.session.query(
+      Show.id,
+      Show.start_time,
+      Show.venue_id,
+      Show.artist_id,
+      Venue.name.label('venue_name'),
+      Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link')
+    ).join(Venue, Venue.id == Show.venue_id) \
+    .join(Artist, Artist.id == Show.artist_id)
+  if after:
+    query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(*after))
+  return query.order_by(Show.start_time, Show.id).limit(limit)
+
+def iter_shows(rows):
+  for row in rows:
+    yield {
+      "id": row.id,
+      "venue_id": row.venue_id,
+      "artist_id": row.artist_id,
+      "venue_name": row.venue_name,
+      "artist_name": row.artist_name,
+      "artist_image_link": row.artist_image_link,
+      "start_time": row.start_time
+    }
+
+def overlapping_shows(venue_id, artist_id, start_time, end_time):
+  # Shows of the venue or of the artist overlapping [start_time, end_time). No show lasts more than
+  # SHOW_MAX_DURATION, so only those starting that long before start_time can overlap: each half is
+  # a bounded range scan of ix_Show_venue_id_start_time / ix_Show_artist_id_start_time.
+  earliest = start_time - timedelta(minutes=current_app.config['SHOW_MAX_DURATION'])
+  overlapping = and_(Show.start_time > earliest, Show.start_time < end_time, Show.end_time > start_time)
+  columns = (Show.venue_id, Show.artist_id, Show.start_time, Show.end_time)
+  venue = db.session.query(*columns).filter(Show.venue_id == venue_id, overlapping)
+  artist = db.session.query(*columns).filter(Show.artist_id == artist_id, overlapping)
+  return venue.union_all(artist).all()
+
+def venue_availability_slots(venue_id, start, end, minimum=timedelta(0)):
+  # Booked and free slots of a venue in [start, end), free ones at least `minimum` long, or None
+  # when there is no such venue. One query returns the venue with its overlapping shows in start
+  # order, and one pass over them turns the gaps between bookings into free slots.
+  earliest = start - timedelta(minutes=current_app.config['SHOW_MAX_DURATION'])
+  rows = db.session.query(Venue.id, Show.start_time, Show.end_time)\
+    .outerjoin(Show, and_(Show.venue_id == Venue.id, Show.start_time > earliest, Show.start_time < end, Show.end_time > start))\
+    .filter(Venue.id == venue_id)\
+    .order_by(Show.start_time)\
+    .all()
+  if not rows:
+    return None
+  busy, free = [], []
+  free_from = start
+  for _, show_start, show_end in rows:
+    if show_start is None:
+      continue
+    busy.append({"start_time": show_start.isoformat(), "end_time": show_end.isoformat()})
+    if show_start > free_from and show_start - free_from >= minimum:
+      free.append({"start_time": free_from.isoformat(), "end_time": show_start.isoformat()})
+    free_from = max(free_from, show_end)
+  if end > free_from and end - free_from >= minimum:
+    free.append({"start_time": free_from.isoformat(), "end_time": end.isoformat()})
+  return {"venue_id": venue_id, "start": start.isoformat(), "end": end.isoformat(), "busy": busy, "free": free}
+
+def venue_with_shows(venue_id):
+  return entity_with_shows(Venue, venue_id, Artist, Show.venue_id, Show.artist_id)
+
+def artist_with_shows(artist_id):
+  return entity_with_shows(Artist, artist_id, Venue, Show.artist_id, Show.venue_id)
+
+def delete_entities(model, show_fk, counterpart, counterpart_fk, ids):
+  # Deletes venues (or artists) by id in one statement; their shows and genre links go with them
+  # through ON DELETE CASCADE. The counters of the artists (or venues) that lose shows are
+  # recounted. Returns the number of venues (or artists) and of shows deleted.
+  losing = db.session.query(counterpart_fk, func.count(Show.id)) \
+    .filter(show_fk.in_(ids)) \
+    .group_by(counterpart_fk) \
+    .all()
+  deleted = db.session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+  recount_shows(counterpart, counterpart_fk, [counterpart_id for counterpart_id, _ in losing])
+  return {"deleted": deleted, "shows_deleted": sum(count for _, count in losing)}
+
+#----------------------------------------------------------------------------#
+# Edits.
+#----------------------------------------------------------------------------#
+# Edit pages carry the version of the row they were filled from. A submission writes only
+# the columns the form changed, in one UPDATE guarded by that version: nothing is written
+# when nothing changed, and an edit saved meanwhile by someone else is reported instead of
+# being overwritten.
+
+VENUE_EDIT_FIELDS = ('name', 'city', 'state', 'phone', 'address', 'image_link', 'facebook_link')
+ARTIST_EDIT_FIELDS = ('name', 'city', 'state', 'phone', 'image_link', 'facebook_link')
+
+def editable_row(model, entity_id, fields):
+  columns = [getattr(model, field) for field in fields]
+  return db.session.query(model.id, model.version, model.genres, *columns).filter(model.id == entity_id).first()
+
+def fill_form(form, row, fields):
+  for field in fields:
+    getattr(form, field).data = getattr(row, field)
+  form.genres.data = split_genres(row.genres)
+  form.version.data = row.version
+  form.genres_shown.data = '1'
+
+def form_changes(form, row, fields):
+  # {column: value} of the submitted fields whose value differs from the row; fields the page
+  # does not show are not submitted and left alone. An empty input equals a missing value.
+  changes = {}
+  for field in fields:
+    submitted = getattr(form, field)
+    if submitted.raw_data and (submitted.data or None) != (getattr(row, field) or None):
+      changes[field] = submitted.data
+  return changes
+
+def update_entity(model, links, link_fk, entity_id, form, fields):
+  # Saves an edit form; returns 'updated', 'unchanged', 'conflict', 'missing' or 'invalid'
+  # (no version, or not a number: there would be nothing to guard the write with).
+  row = editable_row(model, entity_id, fields)
+  if row is None:
+    return 'missing'
+  try:
+    version = int(form.version.data)
+  except (TypeError, ValueError):
+    return 'invalid'
+  if version != row.version:
+    return 'conflict'
+
+  changes = form_changes(form, row, fields)
+  old_genres = split_genres(row.genres)
+  genres = list(dict.fromkeys(form.genres.data or []))
+  #genres are left alone unless submitted, or shown and cleared
+  if (form.genres.raw_data or form.genres_shown.data) and genres != old_genres:
+    changes["genres"] = ','.join(genres)
+  if not changes:
+    return 'unchanged'
+
+  changes["version"] = version + 1
+  updated = db.session.execute(model.__table__.update() \
+    .where(and_(model.id == entity_id, model.version == version)) \
+    .values(**changes)).rowcount
+  if not updated:
+    db.session.rollback()
+    return 'conflict'
+  if "genres" in changes:
+    link_genres(links, link_fk, entity_id, old_genres, genres)
+  db.session.commit()
+  return 'updated'
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+# Venue/Artist.upcoming_shows_count and past_shows_count count the shows starting after,
+# and up to, ShowRollover.rolled_over_at. Every write of shows keeps them in step, and
+# `flask rollover-shows`, run periodically, moves that time to now and shifts the shows
+# that have started since from upcoming to past. Listings read the counts as columns.
+
+def seed_rollover():
+  # Creates the ShowRollover row where it is missing (a database made with db.create_all(),
+  # or the row deleted) as migration b6e2d94c0f18 does: rolled over now, every venue and
+  # artist recounted. Two transactions seeding at once conflict on the id; one of them fails.
+  rollover = ShowRollover(id=1, rolled_over_at=datetime.now())
+  db.session.add(rollover)
+  db.session.flush()
+  recount_shows(Venue, Show.venue_id)
+  recount_shows(Artist, Show.artist_id)
+  return rollover
+
+def rollover_time():
+  # The rollover time, read with a shared lock so a rollover cannot move it until the current
+  # transaction commits; None when there is no ShowRollover row.
+  return db.session.query(ShowRollover.rolled_over_at).with_for_update(read=True).scalar()
+
+def count_new_show(venue_id, artist_id, start_time):
+  # Counts a show being inserted in the current transaction.
+  rolled_over_at = rollover_time()
+  if rolled_over_at is None:
+    #the recount counts the (flushed) show too
+    seed_rollover()
+    return
+  counter = 'upcoming_shows_count' if start_time > rolled_over_at else 'past_shows_count'
+  for model, entity_id in ((Venue, venue_id), (Artist, artist_id)):
+    db.session.query(model).filter(model.id == entity_id) \
+      .update({counter: getattr(model, counter) + 1}, synchronize_session=False)
+
+def recount_shows(model, show_fk, ids=None):
+  # Recounts the shows of some venues (or artists), or of all of them, from scratch, after bulk
+  # inserts and deletes.
+  owners = db.session.query(model)
+  if ids is not None:
+    ids = set(ids)
+    if not ids:
+      return
+    owners = owners.filter(model.id.in_(ids))
+  rolled_over_at = rollover_time() or seed_rollover().rolled_over_at
+  def shows_where(condition):
+    return db.session.query(func.count(Show.id)).filter(show_fk == model.id, condition).label('shows')
+  owners.update({
+    model.upcoming_shows_count: shows_where(Show.start_time > rolled_over_at),
+    model.past_shows_count: shows_where(Show.start_time <= rolled_over_at),
+  }, synchronize_session=False)
+
+def rollover_shows(now=None):
+  # Moves the shows started since the last rollover from upcoming to past; returns how many.
+  now = now or datetime.now()
+  rollover = db.session.query(ShowRollover).with_for_update().first() or seed_rollover()
+  if now <= rollover.rolled_over_at:
+    #nothing to move; commits a row seed_rollover() just created
+    db.session.commit()
+    return 0
+  started = and_(Show.start_time > rollover.rolled_over_at, Show.start_time <= now)
+  moved = db.session.query(func.count(Show.id)).filter(started).scalar()
+  if moved:
+    for model, show_fk in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+      started_shows = db.session.query(func.count(Show.id)).filter(show_fk == model.id, started).label('started')
+      db.session.query(model).filter(model.id.in_(db.session.query(show_fk).filter(started))).update({
+        model.upcoming_shows_count: model.upcoming_shows_count - started_shows,
+        model.past_shows_count: model.past_shows_count + started_shows,
+      }, synchronize_session=False)
+  rollover.rolled_over_at = now
+  db.session.commit()
+  return moved
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+def import_genres(model, links, link_fk, rows, floor):
+  # Links the rows just inserted after id `floor` to their genres in two set-based statements,
+  # matching each comma separated genres value against the genre names.
+  names = set(name for _, row in rows for name in split_genres(row["genres"]))
+  if names:
+    known = set(name for (name,) in db.session.query(Genre.name).filter(Genre.name.in_(names)))
+    missing = [{"name": name} for name in sorted(names - known)]
+    if missing:
+      db.session.execute(Genre.__table__.insert(), missing)
+  tagged = db.session.query(model.id, Genre.id) \
+    .join(Genre, (literal(',') + model.genres + literal(',')).like(literal('%,') + Genre.name + literal(',%'))) \
+    .filter(model.id > floor) \
+    .filter(~exists().where(link_fk == model.id))
+  db.session.execute(links.insert().from_select([link_fk.name, 'genre_id'], tagged.statement))
+
+def import_entity_chunk(model, links, link_fk):
+  def write_chunk(rows):
+    try:
+      floor = db.session.query(func.max(model.id)).scalar() or 0
+      db.session.execute(model.__table__.insert(), [row for _, row in rows])
+      import_genres(model, links, link_fk, rows, floor)
+      db.session.commit()
+    except:
+      db.session.rollback()
+      raise
+  return write_chunk
+
+def booked_shows(rows):
+  # {('venue', id) / ('artist', id): [(start, end, line)]} of the stored shows of the venues and
+  # artists of `rows` that may overlap one of them (line is None); the rows' venues and artists
+  # stay locked until commit, as for a show booked through the form.
+  earliest = min(row["start_time"] for _, row in rows) - timedelta(minutes=current_app.config['SHOW_MAX_DURATION'])
+  latest = max(row["end_time"] for _, row in rows)
+  window = and_(Show.start_time > earliest, Show.start_time < latest)
+  booked = {}
+  for kind, show_fk in (('venue', Show.venue_id), ('artist', Show.artist_id)):
+    ids = set(row[kind + "_id"] for _, row in rows)
+    shows = db.session.query(show_fk, Show.start_time, Show.end_time).filter(show_fk.in_(ids), window)
+    for id, start_time, end_time in shows:
+      booked.setdefault((kind, id), []).append((start_time, end_time, None))
+  return booked
+
+def import_show_chunk(rows):
+  # Shows whose venue or artist does not exist, or that overlap a show of their venue or artist
+  # (stored, or on an earlier line of the chunk), are rejected instead of failing the chunk.
+  try:
+    venue_ids = set(row["venue_id"] for _, row in rows)
+    artist_ids = set(row["artist_id"] for _, row in rows)
+    venue_ids = set(id for (id,) in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids)).with_for_update())
+    artist_ids = set(id for (id,) in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids)).with_for_update())
+    rejected = {}
+    for line, row in rows:
+      if row["venue_id"] not in venue_ids:
+        rejected[line] = {"venue_id": ["No venue with this id."]}
+      elif row["artist_id"] not in artist_ids:
+        rejected[line] = {"artist_id": ["No artist with this id."]}
+
+    checked = [(line, row) for line, row in rows if line not in rejected]
+    booked = booked_shows(checked) if checked else {}
+    for line, row in checked:
+      keys = (('venue', row["venue_id"]), ('artist', row["artist_id"]))
+      for kind, id in keys:
+        conflict = next((show for show in booked.get((kind, id), ())
+          if show[0] < row["end_time"] and show[1] > row["start_time"]), None)
+        if conflict is not None:
+          message = 'The %s is booked from %s to %s' % (kind, conflict[0], conflict[1])
+          if conflict[2] is not None:
+            message += ' by line %s' % conflict[2]
+          rejected[line] = {"start_time": [message + '.']}
+          break
+      else:
+        for key in keys:
+          booked.setdefault(key, []).append((row["start_time"], row["end_time"], line))
+
+    valid = [row for line, row in rows if line not in rejected]
+    if valid:
+      db.session.execute(Show.__table__.insert(), valid)
+      recount_shows(Venue, Show.venue_id, [row["venue_id"] for row in valid])
+      recount_shows(Artist, Show.artist_id, [row["artist_id"] for row in valid])
+    db.session.commit()
+  except:
+    db.session.rollback()
+    raise
+  return rejected
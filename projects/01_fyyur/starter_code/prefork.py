@@ -0,0 +1,75 @@
+#----------------------------------------------------------------------------#
+# Preloaded prefork serving.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The master creates the app once, before forking, so the imports, the config,
+# the compiled templates and the configured ORM mappers are shared by all the
+# workers (copy-on-write) instead of being rebuilt in each. preload() also runs
+# the WARMUP_PATHS requests in the master, which leaves behind what holds in
+# every process (SQL compiled per statement shape, modules imported on first
+# use), then closes its database connections and stops the log thread: neither
+# may cross a fork. A worker starts on an empty connection pool (after_fork)
+# and requests WARMUP_PATHS again before it accepts traffic (warm_up), so its
+# first connections are not opened while a client waits.
+#----------------------------------------------------------------------------#
+
+import gc
+import time
+
+from sqlalchemy.orm import configure_mappers
+
+import logs
+import templating
+from cache import BYPASS
+from models import db
+
+
+def preload(app):
+  # In the master, once, before the first worker is forked; returns the warm-up timings.
+  configure_mappers()
+  if not app.config['TEMPLATE_PRECOMPILE']:
+    templating.precompile(app)
+  timings = warm_up(app)
+  db.get_engine(app).dispose()
+  logs.stop(app)
+  #what exists now lives as long as the master; kept out of the collector, its pages stay shared
+  gc.freeze()
+  return timings
+
+
+def after_fork(app):
+  # In a worker, right after the fork. The engine gets a new, empty pool; connections the
+  # master may still hold are its own and are left open.
+  engine = db.get_engine(app)
+  try:
+    engine.dispose(close=False)
+  except TypeError:
+    #before SQLAlchemy 1.4.33; preload() closed the master's connections already
+    engine.dispose()
+  app.extensions['pool_metrics'].reset()
+  logs.start(app)
+
+
+def warm_up(app, connections=1):
+  # Requests WARMUP_PATHS through the views (not from the page cache), then opens up to
+  # `connections` pooled database connections; returns [(path, status, ms)].
+  timings = []
+  client = app.test_client()
+  for path in app.config['WARMUP_PATHS']:
+    started = time.perf_counter()
+    try:
+      response = client.get(path, environ_base={BYPASS: True})
+      response.close()
+      status = response.status_code
+    except Exception:
+      app.logger.exception('warm-up request %s failed', path)
+      status = None
+    timings.append((path, status, (time.perf_counter() - started) * 1000))
+
+  if connections > 1 and not app.config['DB_PGBOUNCER']:
+    engine = db.get_engine(app)
+    opened = [engine.connect() for _ in range(min(connections, app.config['DB_POOL_SIZE']))]
+    for connection in opened:
+      connection.close()
+  return timings
@@ -0,0 +1,153 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL profiler.
+#
+# Every statement run while a request is handled is recorded with its time
+# and its shape (the statement with literals and IN lists collapsed), so that
+# a loop of lazy loads shows up as one shape executed many times. The totals
+# go out as X-Query-* response headers, recent requests are kept for the
+# /debug/queries page, and a route over its query budget is logged, or fails
+# with QueryBudgetExceeded when the app is testing.
+#----------------------------------------------------------------------------#
+
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+SHAPE_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SHAPE_LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)')
+SHAPE_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+  pass
+
+
+def statement_shape(statement):
+  shape = SHAPE_LITERALS.sub('?', statement)
+  shape = SHAPE_LISTS.sub('(...)', shape)
+  return SHAPE_SPACES.sub(' ', shape).strip()
+
+
+class RequestProfile(object):
+
+  def __init__(self, method, path, endpoint):
+    self.method = method
+    self.path = path
+    self.endpoint = endpoint
+    self.queries = []
+
+  def record(self, statement, duration):
+    self.queries.append((statement, duration))
+
+  @property
+  def count(self):
+    return len(self.queries)
+
+  @property
+  def total_ms(self):
+    return sum(duration for _, duration in self.queries) * 1000
+
+  def repeated(self):
+    # [(shape, executions, total ms)] for shapes executed more than once, most executed first
+    counts = Counter()
+    times = Counter()
+    for statement, duration in self.queries:
+      shape = statement_shape(statement)
+      counts[shape] += 1
+      times[shape] += duration * 1000
+    return [(shape, count, times[shape]) for shape, count in counts.most_common() if count > 1]
+
+  def as_dict(self):
+    return {
+      "method": self.method,
+      "path": self.path,
+      "endpoint": self.endpoint,
+      "count": self.count,
+      "total_ms": round(self.total_ms, 3),
+      "repeated": [{"shape": shape, "count": count, "total_ms": round(ms, 3)} for shape, count, ms in self.repeated()],
+    }
+
+
+class ProfilerState(object):
+  # what the profiler keeps per app: the latest requests, for /debug/queries
+
+  def __init__(self, history=50):
+    self.recent = deque(maxlen=history)
+    self.lock = threading.Lock()
+
+
+class QueryProfiler(object):
+
+  def __init__(self, app=None, engine=None):
+    if app is not None:
+      self.init_app(app, engine)
+
+  def init_app(self, app, engine):
+    # QUERY_PROFILER turns it on; QUERY_BUDGET is an int for every route or a dict of
+    # {endpoint: int}; QUERY_REPEAT_THRESHOLD is how often one shape may run before the
+    # request is logged as a likely N+1.
+    app.extensions['query_profiler'] = ProfilerState(app.config.get('QUERY_PROFILER_HISTORY', 50))
+    if not app.config.get('QUERY_PROFILER'):
+      return
+    event.listen(engine, 'before_cursor_execute', self._before_execute)
+    event.listen(engine, 'after_cursor_execute', self._after_execute)
+    app.before_request(self._start)
+    app.after_request(self._finish)
+
+  def current(self):
+    if not has_request_context():
+      return None
+    return g.get('_query_profile')
+
+  def _start(self):
+    g._query_profile = RequestProfile(request.method, request.full_path.rstrip('?'), request.endpoint)
+
+  def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+    if self.current() is not None:
+      conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+  def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+    profile = self.current()
+    if profile is not None and conn.info.get('query_start'):
+      profile.record(statement, time.perf_counter() - conn.info['query_start'].pop())
+
+  def budget(self, endpoint):
+    budget = current_app.config.get('QUERY_BUDGET')
+    if isinstance(budget, dict):
+      return budget.get(endpoint)
+    return budget
+
+  def _finish(self, response):
+    profile = self.current()
+    if profile is None:
+      return response
+    #streamed pages keep querying after this point; their headers count what ran before the first chunk
+    response.headers['X-Query-Count'] = str(profile.count)
+    response.headers['X-Query-Time'] = '%.3f' % profile.total_ms
+    repeated = profile.repeated()
+    if repeated:
+      response.headers['X-Query-Repeated'] = str(sum(count for _, count, _ in repeated))
+    state = current_app.extensions['query_profiler']
+    with state.lock:
+      state.recent.appendleft(profile)
+
+    threshold = current_app.config.get('QUERY_REPEAT_THRESHOLD', 5)
+    if repeated and repeated[0][1] >= threshold:
+      current_app.logger.warning('%s %s ran the same statement %d times: %s',
+        profile.method, profile.path, repeated[0][1], repeated[0][0])
+    budget = self.budget(profile.endpoint)
+    if budget is not None and profile.count > budget:
+      message = '%s %s ran %d queries, over its budget of %d' % (profile.method, profile.path, profile.count, budget)
+      if current_app.testing:
+        raise QueryBudgetExceeded(message)
+      current_app.logger.warning(message)
+    return response
+
+  def history(self):
+    state = current_app.extensions['query_profiler']
+    with state.lock:
+      return list(state.recent)
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------#
+# Indexed search over venues and artists.
+#
+# Matches a search term against name, city, state and genres, case-insensitive,
+# as a substring or as word prefixes, and ranks the hits by relevance.
+#  - PostgreSQL: GIN pg_trgm index (substring ILIKE) and GIN tsvector index
+#    (word prefixes) over the search document, created by migration 9b81e5c4a0f2.
+#  - SQLite: a trigram FTS5 table "<Table>_search" kept in sync by triggers,
+#    created by the same migration, ranked with bm25.
+#  - Anything else: unindexed ILIKE over the search document.
+# A database made with db.create_all() rather than the migrations gets the same
+# indexes and tables when the models' tables are created (create_indexes()).
+#----------------------------------------------------------------------------#
+
+import re
+from sqlalchemy import DDL, Float, Integer, event, func, literal, literal_column, or_, select, text
+
+# The document has to be spelled exactly like the indexed expression in the migration,
+# otherwise PostgreSQL will not use the expression indexes.
+DOCUMENT = (
+  "coalesce(\"{table}\".name, '') || ' ' || coalesce(\"{table}\".city, '') || ' ' || "
+  "coalesce(\"{table}\".state, '') || ' ' || coalesce(\"{table}\".genres, '')"
+)
+
+SEARCHED_COLUMNS = ('name', 'city', 'state', 'genres')
+
+# Trigram FTS5 cannot match anything shorter than a trigram
+FTS_MIN_TOKEN = 3
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def document(model):
+  return literal_column('(' + DOCUMENT.format(table=model.__tablename__) + ')')
+
+
+def like_pattern(term):
+  #treat % and _ typed by the user literally
+  return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def matches(dialect, model, term):
+  # Returns a subquery of (id, rank) for the rows of `model` matching `term`, best match
+  # first when ordered by rank descending, or None when the term is blank and every row
+  # matches. Callers join it on model.id.
+  term = term.strip()
+  if not term:
+    return None
+  if dialect == 'postgresql':
+    return _postgresql_matches(model, term)
+  if dialect == 'sqlite':
+    return _sqlite_matches(model, term)
+  return _like_matches(model, term)
+
+
+def _postgresql_matches(model, term):
+  doc = document(model)
+  substring = doc.ilike(like_pattern(term), escape='\\')
+  words = WORD.findall(term)
+  if words:
+    #every word of the term as a prefix, in any order: "jazz san" finds "San Francisco ... Jazz"
+    prefixes = func.to_tsquery('simple', ' & '.join(word + ':*' for word in words))
+    condition = or_(substring, func.to_tsvector('simple', doc).op('@@')(prefixes))
+  else:
+    condition = substring
+  #hits on the name outrank hits on the location or the genres
+  rank = 2 * func.word_similarity(term, func.coalesce(model.name, '')) + func.word_similarity(term, doc)
+  return select([model.id.label('id'), rank.label('rank')]).where(condition).alias('search_hits')
+
+
+def _sqlite_matches(model, term):
+  words = WORD.findall(term)
+  if not words or any(len(word) < FTS_MIN_TOKEN for word in words):
+    return _like_matches(model, term)
+  table = model.__tablename__ + '_search'
+  #each word quoted as an FTS5 string so that punctuation in it is not parsed as syntax
+  query = ' AND '.join('"%s"' % word.replace('"', '""') for word in words)
+  #bm25 is lower for better matches; the weights favour name over city, state and genres.
+  #LIMIT -1 stops SQLite from flattening the subquery into the join, where bm25 cannot run.
+  statement = text(
+    'SELECT rowid AS id, -bm25("{table}", 10.0, 2.0, 2.0, 1.0) AS rank '
+    'FROM "{table}" WHERE "{table}" MATCH :query LIMIT -1'.format(table=table)
+  ).bindparams(query=query).columns(id=Integer, rank=Float)
+  return statement.alias('search_hits')
+
+
+def _like_matches(model, term):
+  condition = document(model).ilike(like_pattern(term), escape='\\')
+  return select([model.id.label('id'), literal(0.0).label('rank')]).where(condition).alias('search_hits')
+
+
+def index_statements(dialect, table):
+  # The DDL of migration 9b81e5c4a0f2 for one table, as it stands at that revision.
+  if dialect == 'postgresql':
+    unqualified = DOCUMENT.replace('"{table}".', '')
+    return [
+      'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+      'CREATE INDEX "ix_{0}_search_trgm" ON "{0}" USING gin (({1}) gin_trgm_ops)'.format(table, unqualified),
+      'CREATE INDEX "ix_{0}_search_tsv" ON "{0}" USING gin (to_tsvector(\'simple\', {1}))'.format(table, unqualified),
+    ]
+  if dialect == 'sqlite':
+    search = table + '_search'
+    columns = ', '.join(SEARCHED_COLUMNS)
+    new_values = ', '.join('new.' + column for column in SEARCHED_COLUMNS)
+    old_values = ', '.join('old.' + column for column in SEARCHED_COLUMNS)
+    return [
+      'CREATE VIRTUAL TABLE "{0}" USING fts5({1}, content=\'{2}\', content_rowid=\'id\', tokenize=\'trigram\')'
+        .format(search, columns, table),
+      'CREATE TRIGGER "{0}_ai" AFTER INSERT ON "{1}" BEGIN '
+        'INSERT INTO "{0}"(rowid, {2}) VALUES (new.id, {3}); END'.format(search, table, columns, new_values),
+      'CREATE TRIGGER "{0}_ad" AFTER DELETE ON "{1}" BEGIN '
+        'INSERT INTO "{0}"("{0}", rowid, {2}) VALUES (\'delete\', old.id, {3}); END'
+        .format(search, table, columns, old_values),
+      'CREATE TRIGGER "{0}_au" AFTER UPDATE ON "{1}" BEGIN '
+        'INSERT INTO "{0}"("{0}", rowid, {2}) VALUES (\'delete\', old.id, {3}); '
+        'INSERT INTO "{0}"(rowid, {2}) VALUES (new.id, {4}); END'.format(search, table, columns, old_values, new_values),
+    ]
+  return []
+
+
+def create_indexes(model):
+  # Creates the search indexes (PostgreSQL) or FTS table and triggers (SQLite) of a model
+  # along with its table, for metadata.create_all(); the migrations create them otherwise.
+  table = model.__tablename__
+  for dialect in ('postgresql', 'sqlite'):
+    for statement in index_statements(dialect, table):
+      event.listen(model.__table__, 'after_create', DDL(statement.replace('%', '%%')).execute_if(dialect=dialect))
+  #triggers go with their table, the FTS table does not
+  event.listen(model.__table__, 'before_drop',
+    DDL('DROP TABLE IF EXISTS "%s_search"' % table).execute_if(dialect='sqlite'))
@@ -0,0 +1,132 @@
+#----------------------------------------------------------------------------#
+# Shows: listing, venue availability and booking.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, current_app, flash, jsonify, render_template, request, stream_with_context
+
+import formatting
+from extensions import page_cache
+from forms import ShowForm
+from models import (Artist, Show, Venue, count_new_show, db, iter_shows, overlapping_shows, show_end_time,
+  shows_page, venue_availability_slots)
+from views import show_created
+
+bp = Blueprint('shows', __name__)
+
+# -----------------------------------------------------------------
+#  Shows
+#  ----------------------------------------------------------------
+@bp.route('/shows')
+@page_cache.cached('shows')
+def shows():
+  after = None
+  if request.args.get('after_time') and request.args.get('after_id'):
+    try:
+      after = (datetime.fromisoformat(request.args['after_time']), int(request.args['after_id']))
+    except ValueError:
+      abort(400)
+  per_page = current_app.config['SHOWS_PER_PAGE']
+  stream = request.args.get('stream', type=int)
+  if stream is None:
+    stream = current_app.config['SHOWS_STREAM']
+  query = shows_page(after, per_page)
+  context = {"per_page": per_page, "stream": stream}
+
+  if not stream:
+    return render_template('pages/shows.html', shows=list(iter_shows(query)), **context)
+
+  # Streamed: the rows are fetched in batches from the cursor while the template is being
+  # sent, so the first bytes go out before the page has been read from the database.
+  current_app.update_template_context(context)
+  template = current_app.jinja_env.get_template('pages/shows.html')
+  rows = query.yield_per(current_app.config['SHOWS_STREAM_BATCH'])
+  return Response(stream_with_context(template.generate(shows=iter_shows(rows), **context)))
+
+@bp.route('/venues/<int:venue_id>/availability')
+def venue_availability(venue_id):
+  # Free and booked slots of a venue as JSON, between ?start= and ?end= (ISO dates or times,
+  # the next 7 days by default), listing only free slots of at least ?min= minutes.
+  try:
+    start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else \
+      datetime.combine(datetime.today(), datetime.min.time())
+    end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else start + timedelta(days=7)
+    minimum = timedelta(minutes=int(request.args['min'])) if 'min' in request.args else None
+  except ValueError:
+    abort(400)
+  if minimum is None:
+    minimum = timedelta(0)
+  elif minimum <= timedelta(0):
+    abort(400)
+  if end <= start or end - start > timedelta(days=current_app.config['AVAILABILITY_MAX_DAYS']):
+    abort(400)
+  slots = venue_availability_slots(venue_id, start, end, minimum)
+  if slots is None:
+    abort(404)
+  return jsonify(slots)
+
+# -----------------------------------------------------------------
+#  Create Shows
+#  ----------------------------------------------------------------
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+  error = False
+  form = ShowForm()
+  try:
+    current_app.logger.debug('show form: %s', request.form.to_dict(flat=False))
+    artist_id = int(form.artist_id.data)
+    venue_id = int(form.venue_id.data)
+    #the form wants seconds, the placeholder does not
+    start_time = form.start_time.data
+    if start_time is None:
+      #imported here, most workers never need the parser
+      import dateutil.parser
+      start_time = dateutil.parser.parse(request.form.get('start_time'))
+    #a duration that is not a number is refused, not replaced with the default
+    if not form.duration.validate(form):
+      raise ValueError('show duration invalid: %s' % ', '.join(form.duration.errors))
+    duration = form.duration.data or current_app.config['SHOW_DEFAULT_DURATION']
+    if not 0 < duration <= current_app.config['SHOW_MAX_DURATION']:
+      raise ValueError('show duration out of range: %s' % duration)
+    end_time = show_end_time(start_time, duration)
+    #the venue and artist rows stay locked until commit, so two overlapping bookings of
+    #either one cannot both pass the check below
+    venue = db.session.query(Venue.id).filter(Venue.id == venue_id).with_for_update().scalar()
+    artist = db.session.query(Artist.id).filter(Artist.id == artist_id).with_for_update().scalar()
+    if venue is None or artist is None:
+      raise ValueError('no venue %s or no artist %s' % (venue_id, artist_id))
+    conflicts = overlapping_shows(venue_id, artist_id, start_time, end_time)
+    if conflicts:
+      db.session.rollback()
+      conflict = conflicts[0]
+      booked = 'venue' if conflict.venue_id == venue_id else 'artist'
+      flash('Show could not be listed: the %s is booked from %s to %s.' % (booked,
+        formatting.datetime_filter(conflict.start_time), formatting.datetime_filter(conflict.end_time)))
+      return render_template('forms/new_show.html', form=form)
+    show = Show(artist_id=artist_id, venue_id=venue_id, start_time=start_time, end_time=end_time)
+    db.session.add(show)
+    count_new_show(venue_id, artist_id, start_time)
+    db.session.commit()
+    show_created(venue_id, artist_id)
+    # on successful db insert, flash success
+    flash('Show was successfully listed!')
+  except:
+    db.session.rollback()
+    error = True
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    flash('An error occurred. Show could not be listed.')
+    current_app.logger.exception('show could not be listed')
+  finally:
+    db.session.close()
+  # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+  return render_template('pages/home.html')
@@ -0,0 +1,39 @@
+#----------------------------------------------------------------------------#
+# Template precompilation.
+#
+# Jinja compiles a template to Python code the first time it is rendered, in
+# every worker. With a FileSystemBytecodeCache the compiled code is written to
+# disk once and loaded by later workers and restarts, and precompile() loads
+# every template when the app starts, so that no request waits on a compile.
+# Cached code is keyed by the template's source checksum: an edited template
+# is compiled again.
+#----------------------------------------------------------------------------#
+
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_EXTENSIONS = ('html',)
+
+
+def init_app(app):
+  # TEMPLATE_CACHE_DIR is shared by the workers; None is a per-user directory in the system temp dir.
+  if not app.config['TEMPLATE_BYTECODE_CACHE']:
+    return
+  directory = app.config['TEMPLATE_CACHE_DIR']
+  if directory:
+    os.makedirs(directory, exist_ok=True)
+  app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile(app):
+  # Loads every template into the environment's cache (compiling what the bytecode cache
+  # does not hold yet); returns [(name, ms)].
+  env = app.jinja_env
+  timings = []
+  for name in sorted(env.list_templates(extensions=TEMPLATE_EXTENSIONS)):
+    started = time.perf_counter()
+    env.get_template(name)
+    timings.append((name, (time.perf_counter() - started) * 1000))
+  return timings
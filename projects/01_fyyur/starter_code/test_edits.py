@@ -0,0 +1,98 @@
+#----------------------------------------------------------------------------#
+# Edit submissions: changed columns only, guarded by the row version.
+#
+#   python -m pytest test_edits.py
+#
+# Submits the venue and artist edit forms on a small generated database: a
+# partial submission leaves the fields it does not carry (genres included)
+# alone, an unchanged one writes nothing, and a stale or missing version is
+# refused instead of overwriting the row.
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'benchmarks'))
+
+import generate
+from app import create_app
+from models import Artist, Venue, artist_genres, db, split_genres
+
+
+class EditTestCase(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.directory = tempfile.TemporaryDirectory()
+    cls.app = create_app({
+      "TESTING": True,
+      "SQLALCHEMY_DATABASE_URI": 'sqlite:///' + os.path.join(cls.directory.name, 'fyyur_test.db'),
+      "PAGE_CACHE": 'none',
+      "WTF_CSRF_ENABLED": False,
+      "TEMPLATE_PRECOMPILE": False,
+    })
+    generate.populate(cls.app, venues=5, artists=5, shows=20, log=lambda message: None)
+
+  @classmethod
+  def tearDownClass(cls):
+    with cls.app.app_context():
+      db.engine.dispose()
+    cls.directory.cleanup()
+
+  def setUp(self):
+    self.client = self.app.test_client()
+
+  def row(self, model, entity_id):
+    with self.app.app_context():
+      return db.session.query(model.name, model.genres, model.version).filter(model.id == entity_id).one()
+
+  def genre_links(self, artist_id):
+    with self.app.app_context():
+      return db.session.query(artist_genres).filter(artist_genres.c.artist_id == artist_id).count()
+
+  def test_partial_submission_leaves_other_fields_alone(self):
+    before = self.row(Artist, 1)
+    links = self.genre_links(1)
+    self.assertTrue(links)
+    response = self.client.post('/artists/1/edit', data={"name": 'Renamed Band', "version": before.version})
+    self.assertEqual(response.status_code, 302)
+    after = self.row(Artist, 1)
+    self.assertEqual(after.name, 'Renamed Band')
+    self.assertEqual(after.genres, before.genres)
+    self.assertEqual(after.version, before.version + 1)
+    self.assertEqual(self.genre_links(1), links)
+
+  def test_cleared_genres_on_the_edit_page_are_saved(self):
+    before = self.row(Artist, 2)
+    response = self.client.post('/artists/2/edit', data={"version": before.version, "genres_shown": '1'})
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual(split_genres(self.row(Artist, 2).genres), [])
+    self.assertEqual(self.genre_links(2), 0)
+
+  def test_unchanged_submission_writes_nothing(self):
+    before = self.row(Venue, 1)
+    response = self.client.post('/venues/1/edit', data={"name": before.name, "version": before.version,
+      "genres": split_genres(before.genres), "genres_shown": '1'})
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual(self.row(Venue, 1).version, before.version)
+
+  def test_stale_version_is_a_conflict(self):
+    before = self.row(Venue, 2)
+    response = self.client.post('/venues/2/edit', data={"name": 'Overwritten', "version": before.version - 1})
+    self.assertEqual(response.status_code, 302)
+    self.assertTrue(response.location.endswith('/venues/2/edit'))
+    self.assertEqual(self.row(Venue, 2), before)
+
+  def test_missing_or_malformed_version_is_refused(self):
+    before = self.row(Venue, 3)
+    for data in ({"name": 'Unguarded'}, {"name": 'Unguarded', "version": 'x'}):
+      with self.subTest(data=data):
+        self.assertEqual(self.client.post('/venues/3/edit', data=data).status_code, 400)
+    self.assertEqual(self.row(Venue, 3), before)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,97 @@
+#----------------------------------------------------------------------------#
+# Query budgets of the hot routes.
+#
+#   python -m pytest test_query_budget.py
+#
+# Requests every route QUERY_BUDGET lists on a small generated database, with
+# the profiler on and the app testing, so a route running more queries than
+# its budget (a lazy load in a loop, the N+1 the listing, search and detail
+# pages were rewritten to avoid) raises QueryBudgetExceeded and fails here.
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'benchmarks'))
+
+import generate
+from app import create_app
+from models import Genre, db
+from profiler import QueryBudgetExceeded
+
+
+def budget_app(database_url, **settings):
+  config = {
+    "TESTING": True,
+    "SQLALCHEMY_DATABASE_URI": database_url,
+    "QUERY_PROFILER": True,
+    #every request has to reach the database
+    "PAGE_CACHE": 'none',
+    "WTF_CSRF_ENABLED": False,
+    "TEMPLATE_PRECOMPILE": False,
+  }
+  config.update(settings)
+  return create_app(config)
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.directory = tempfile.TemporaryDirectory()
+    cls.database_url = 'sqlite:///' + os.path.join(cls.directory.name, 'fyyur_test.db')
+    cls.app = budget_app(cls.database_url)
+    #enough shows per venue and artist for a query per show to stand out
+    generate.populate(cls.app, venues=20, artists=30, shows=400, log=lambda message: None)
+    with cls.app.app_context():
+      cls.genre = db.session.query(Genre.name).order_by(Genre.id).first()[0]
+
+  @classmethod
+  def tearDownClass(cls):
+    with cls.app.app_context():
+      db.engine.dispose()
+    cls.directory.cleanup()
+
+  def setUp(self):
+    self.client = self.app.test_client()
+
+  def requests(self):
+    # (endpoint, method, path, form) of every route with a budget
+    return [
+      ('index', 'GET', '/', None),
+      ('venues.venues', 'GET', '/venues', None),
+      ('venues.venues_by_genre', 'GET', '/venues/genres/%s' % self.genre, None),
+      ('venues.search_venues', 'POST', '/venues/search', {"search_term": 'hall'}),
+      ('venues.show_venue', 'GET', '/venues/1', None),
+      ('artists.artists', 'GET', '/artists', None),
+      ('artists.artists_by_genre', 'GET', '/artists/genres/%s' % self.genre, None),
+      ('artists.search_artists', 'POST', '/artists/search', {"search_term": 'band'}),
+      ('artists.show_artist', 'GET', '/artists/1', None),
+      ('shows.shows', 'GET', '/shows', None),
+    ]
+
+  def test_routes_stay_within_budget(self):
+    for endpoint, method, path, form in self.requests():
+      with self.subTest(endpoint=endpoint):
+        response = self.client.open(path, method=method, data=form)
+        self.assertEqual(response.status_code, 200)
+        budget = self.app.config['QUERY_BUDGET'][endpoint]
+        self.assertLessEqual(int(response.headers['X-Query-Count']), budget)
+
+  def test_every_budget_is_tested(self):
+    tested = set(endpoint for endpoint, _, _, _ in self.requests())
+    self.assertEqual(tested, set(self.app.config['QUERY_BUDGET']))
+
+  def test_route_over_budget_fails(self):
+    app = budget_app(self.database_url, QUERY_BUDGET={"venues.show_venue": 0})
+    with self.assertRaises(QueryBudgetExceeded):
+      app.test_client().get('/venues/1')
+    #the other app keeps its own budgets
+    self.assertEqual(self.client.get('/venues/1').status_code, 200)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,176 @@
+#----------------------------------------------------------------------------#
+# Venues: listing, search, genres, detail pages, create, edit and delete.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request
+
+from extensions import page_cache
+from forms import VenueForm
+from models import (Artist, Show, VENUE_EDIT_FIELDS, Venue, by_genre, db, delete_entities, editable_row,
+  fill_form, search_with_upcoming_counts, split_genres, set_genres, update_entity, venue_areas, venue_genres,
+  venue_with_shows)
+from views import delete_ids, edit_saved, venue_changed, venue_created
+
+bp = Blueprint('venues', __name__)
+
+# -----------------------------------------------------------------
+#  View All Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@page_cache.cached('venues')
+def venues():
+  after_city = request.args.get('after_city')
+  after_state = request.args.get('after_state')
+  after = (after_city, after_state) if after_city is not None and after_state is not None else None
+  areas, next_cursor = venue_areas(after, current_app.config['AREAS_PER_PAGE'])
+  return render_template('pages/venues.html', areas=areas, next_cursor=next_cursor)
+
+# -----------------------------------------------------------------
+#  Search venue
+#  ----------------------------------------------------------------
+@bp.route('/venues/search', methods=['POST'])
+def search_venues():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  search_term=request.form.get('search_term', '')
+  page=request.form.get('page', 1, type=int)
+  response=search_with_upcoming_counts(Venue, search_term, max(page, 1), current_app.config['SEARCH_RESULTS_PER_PAGE'])
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+# -----------------------------------------------------------------
+#  Venues by genre
+#  ----------------------------------------------------------------
+@bp.route('/venues/genres/<genre>')
+@page_cache.cached('venues_by_genre')
+def venues_by_genre(genre):
+  page = max(request.args.get('page', 1, type=int), 1)
+  results = by_genre(Venue, venue_genres, venue_genres.c.venue_id, genre, page, current_app.config['SEARCH_RESULTS_PER_PAGE'])
+  return render_template('pages/genre.html', genre=genre, results=results, kind='venues')
+# -----------------------------------------------------------------
+#  View specific venue
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>')
+@page_cache.cached('show_venue', 'venue_id')
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+  result = venue_with_shows(venue_id)
+  if result is None:
+    abort(404)
+  venue = result["entity"]
+
+  data = {
+    "id": venue.id,
+    "name": venue.name,
+    "genres": split_genres(venue.genres),
+    "address": venue.address,
+    "city": venue.city,
+    "state": venue.state,
+    "phone": venue.phone,
+    "website": venue.website,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking_talent,
+    "image_link": venue.image_link,
+    "upcoming_shows": result["upcoming_shows"],
+    "past_shows": result["past_shows"],
+    "past_shows_count": result["past_shows_count"],
+    "upcoming_shows_count": result["upcoming_shows_count"]
+  }
+  return render_template('pages/show_venue.html', venue=data)
+# -----------------------------------------------------------------
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  error = False
+  try:
+    current_app.logger.debug('venue form: %s', request.form.to_dict(flat=False))
+    name = request.form.get('name')
+    city = request.form.get('city')
+    state =request.form.get('state')
+    genres =request.form.getlist('genres')
+    phone = request.form.get('phone')
+    address = request.form.get('address')
+    facebook_link =request.form.get('facebook_link')
+    venue = Venue(name=name, city=city, state=state, phone=phone, address=address, facebook_link=facebook_link)
+    set_genres(venue, genres)
+    db.session.add(venue)
+    db.session.commit()
+    venue_created()
+    # on successful db insert, flash success
+    flash('venue ' + name + ' was successfully listed!')
+  except:
+    db.session.rollback()
+    error = True
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    flash('An error occurred. venue ' + name + ' could not be listed.')
+    current_app.logger.exception('venue %s could not be listed', name)
+  finally:
+    db.session.close()
+  return render_template('pages/home.html')
+# -----------------------------------------------------------------
+#  UPDATE Venue
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  venue = editable_row(Venue, venue_id, VENUE_EDIT_FIELDS)
+  if venue is None:
+    abort(404)
+  form = VenueForm()
+  fill_form(form, venue, VENUE_EDIT_FIELDS)
+
+  # TODO: populate form with values from venue with ID <venue_id>
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  form = VenueForm()
+  try:
+    result = update_entity(Venue, venue_genres, venue_genres.c.venue_id, venue_id, form, VENUE_EDIT_FIELDS)
+  except:
+    db.session.rollback()
+    current_app.logger.exception('venue %s could not be updated', venue_id)
+    result = 'error'
+  finally:
+    db.session.close()
+  if result == 'updated':
+    venue_changed(venue_id)
+  return redirect(edit_saved(result, 'venue', venue_id))
+# -----------------------------------------------------------------
+#  Delete Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues', methods=['DELETE'])
+@bp.route('/venues/<int:venue_id>', methods=['DELETE'])
+def delete_venue(venue_id=None):
+  # Deletes one venue, or many at once, with their shows; responds with the deleted counts.
+  # Nothing is flashed: the caller is a script, the message would show on some later page.
+  ids = delete_ids(venue_id)
+  try:
+    counts = delete_entities(Venue, Show.venue_id, Artist, Show.artist_id, ids)
+    db.session.commit()
+  except:
+    db.session.rollback()
+    current_app.logger.exception('venues %s could not be deleted', ids)
+    return jsonify({"error": "venues could not be deleted"}), 500
+  finally:
+    db.session.close()
+  if not counts["deleted"]:
+    return jsonify(counts), 404
+  for id in ids:
+    venue_changed(id)
+  return jsonify(counts)
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
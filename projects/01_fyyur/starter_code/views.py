@@ -0,0 +1,83 @@
+#----------------------------------------------------------------------------#
+# Controller helpers shared by the venue, artist and show blueprints.
+#----------------------------------------------------------------------------#
+
+from flask import abort, current_app, flash, request, url_for
+
+from extensions import page_cache
+
+#----------------------------------------------------------------------------#
+# Page cache invalidation.
+#----------------------------------------------------------------------------#
+
+# Which cached pages show what: listings show names, detail pages show the shows with
+# the name and image of the venue/artist on the other side, /venues shows upcoming counts.
+
+def venue_created():
+  page_cache.invalidate('venues')
+  page_cache.invalidate('venues_by_genre')
+
+def venue_changed(venue_id):
+  venue_created()
+  page_cache.invalidate('show_venue', venue_id)
+  page_cache.invalidate('shows')
+  page_cache.invalidate('show_artist')
+
+def artist_created():
+  page_cache.invalidate('artists')
+  page_cache.invalidate('artists_by_genre')
+
+def artist_changed(artist_id):
+  artist_created()
+  page_cache.invalidate('show_artist', artist_id)
+  page_cache.invalidate('shows')
+  page_cache.invalidate('show_venue')
+
+def show_created(venue_id, artist_id):
+  page_cache.invalidate('shows')
+  page_cache.invalidate('venues')
+  page_cache.invalidate('show_venue', venue_id)
+  page_cache.invalidate('show_artist', artist_id)
+
+def shows_rolled_over():
+  #the area listing shows the counted upcoming shows
+  page_cache.invalidate('venues')
+
+#----------------------------------------------------------------------------#
+# Edits.
+#----------------------------------------------------------------------------#
+
+def edit_saved(result, kind, entity_id):
+  # Flashes the outcome of an edit; returns the page to go to next.
+  if result == 'missing':
+    abort(404)
+  if result == 'invalid':
+    abort(400)
+  if result == 'conflict':
+    flash('%s was changed by someone else while you were editing it, your changes were not saved. '
+      'The form now shows the current values.' % kind)
+    return url_for(kind + 's.edit_' + kind, **{kind + '_id': entity_id})
+  if result == 'unchanged':
+    flash('Nothing to update, %s was not changed.' % kind)
+  elif result == 'error':
+    flash('An error occurred. %s could not be updated.' % kind)
+  return url_for(kind + 's.show_' + kind, **{kind + '_id': entity_id})
+
+#----------------------------------------------------------------------------#
+# Deletes.
+#----------------------------------------------------------------------------#
+
+def delete_ids(entity_id=None):
+  # The ids to delete: the one in the url, or for a bulk delete a JSON body {"ids": [...]}
+  # or ?ids=1,2,3. Aborts with 400 on anything else.
+  if entity_id is not None:
+    return [entity_id]
+  body = request.get_json(silent=True) or {}
+  ids = body.get('ids') if isinstance(body, dict) and 'ids' in body else request.args.get('ids', '').split(',')
+  try:
+    ids = sorted(set(int(id) for id in ids if str(id).strip()))
+  except (TypeError, ValueError):
+    abort(400)
+  if not ids or len(ids) > current_app.config['DELETE_MAX_IDS']:
+    abort(400)
+  return ids
@@ -0,0 +1,12 @@
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# With gunicorn.conf.py the master imports this module once and the workers
+# are forked from it, see prefork.py.
+#----------------------------------------------------------------------------#
+
+from app import create_app
+
+app = create_app()